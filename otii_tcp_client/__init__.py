@@ -1,4 +1,4 @@
 """Otii TCP Client
 """
 
-__version__ = "1.0.10"
+__version__ = "1.0.11"
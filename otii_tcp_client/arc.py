@@ -2,122 +2,494 @@
 #coding: utf-8
 # pylint: disable=missing-module-docstring
 
-from otii_tcp_client import otii_exception, battery_emulator
+import concurrent.futures
+import contextlib
+import operator
+from typing import NamedTuple
+from otii_tcp_client import framing, otii_connection, battery_emulator
+
+# Response timeouts (s) for commands that need more than the default timeout
+DEFAULT_TIMEOUT = 3
+COMMAND_TIMEOUTS = {
+    "arc_add_to_project": 10,
+    "arc_calibrate": 10,
+    "arc_firmware_upgrade": 15,
+}
+
+# Getters that are cached, mapped from the commands that change their values
+INVALIDATES = {
+    "arc_set_adc_resistor": ("arc_get_adc_resistor",),
+    "arc_set_channel_samplerate": ("arc_get_channel_samplerate",),
+    "arc_set_max_current": ("arc_get_max_current",),
+    "arc_set_range": ("arc_get_range",),
+    "arc_set_supply_battery_emulator": ("arc_get_supply_mode",),
+    "arc_set_supply_power_box": ("arc_get_supply_mode",),
+    "arc_set_uart_baudrate": ("arc_get_uart_baudrate",),
+}
+# Commands that may change any cached value
+CLEARS_CACHE = {"arc_calibrate", "arc_commit", "arc_firmware_upgrade", "arc_set_property"}
+# Cached getters that setters write their value through to, with the key of the value
+WRITES_THROUGH = {
+    "arc_set_adc_resistor": ("arc_get_adc_resistor", "value"),
+    "arc_set_channel_samplerate": ("arc_get_channel_samplerate", "value"),
+    "arc_set_max_current": ("arc_get_max_current", "value"),
+    "arc_set_range": ("arc_get_range", "range"),
+    "arc_set_uart_baudrate": ("arc_get_uart_baudrate", "value"),
+}
+
+def check_range(name, value, minimum, maximum):
+    """ Check a value before it is sent, instead of waiting for the server to reject it.
+
+    Raises:
+        ValueError: If the value is not between minimum and maximum.
+
+    """
+    if not minimum <= value <= maximum:
+        raise ValueError(name + " should be between " + str(minimum) + "-" + str(maximum) + ", got " + str(value))
+
+def check_pin(pin):
+    """ Check a GPI/GPO pin ID before it is sent.
+
+    Raises:
+        ValueError: If the pin is not 1 or 2.
+
+    """
+    if pin not in (1, 2):
+        raise ValueError("pin should be 1 or 2, got " + str(pin))
+
+def convert(data, function):
+    """ Convert response data, also when it is the :obj:BatchResult of a batched command.
+
+    Args:
+        data: Response data, or a :obj:BatchResult.
+        function (function): Function converting the response data.
+
+    Returns:
+        The converted data, or a :obj:BatchResult with the converted data.
+
+    """
+    if isinstance(data, BatchResult):
+        return BatchResult(data, function)
+    return function(data)
+
+class Version(NamedTuple):
+    """ Hardware and firmware versions of a device
+
+    The versions can also be read by key, as from a dict.
+
+    """
+    hw_version: str
+    fw_version: str
+
+    @classmethod
+    def from_data(cls, data):
+        # pylint: disable=missing-function-docstring
+        return cls(data["hw_version"], data["fw_version"])
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+class BatchResult:
+    """ Class to define the result of a command sent in a batch
+
+    The value is available when the batch has been sent.
+
+    """
+    __slots__ = ("_parent", "_function", "_response")
+
+    def __init__(self, parent=None, function=None):
+        self._parent = parent
+        self._function = function
+        self._response = None
+
+    def set_response(self, response):
+        """ Set the response of the command, called by the connection when the batch is sent.
+
+        Args:
+            response (dict): Decoded JSON server response.
+
+        """
+        self._response = response
+
+    def result(self):
+        """ Get the value returned by the command.
+
+        Returns:
+            The value the command would have returned outside the batch.
+
+        Raises:
+            RuntimeError: If the batch has not been sent yet.
+            Otii_Exception: If the command failed.
+
+        """
+        if self._parent is not None:
+            return self._function(self._parent.result())
+        if self._response is None:
+            raise RuntimeError("The batch has not been sent yet")
+        return otii_connection.response_data(self._response)
+
+    def __getitem__(self, key):
+        return BatchResult(self, operator.itemgetter(key))
+
+    def get(self, key, default=None):
+        # pylint: disable=missing-function-docstring
+        return BatchResult(self, lambda data: data.get(key, default))
+
+    def copy(self):
+        # pylint: disable=missing-function-docstring
+        return BatchResult(self, lambda data: data.copy())
 
 class Arc:
     """ Class to define an Arc or Ace device.
         Includes operations that can be run on the Arc or Ace.
 
+        All devices returned by otii.get_devices share the connection of the Otii object.
+        If the Otii object was created with an :obj:OtiiConnectionPool, each device
+        instead gets its own connection from the pool.
+
     Attributes:
         type (str): Device type, "Arc" for Arc devices.
         id (str): ID of the Arc device.
         name (str): Name of the Arc device.
         connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
+        skip_redundant_writes (bool): True to skip setters when the cached value is already the value to set,
+        default False. Only enable it if no other client, or the Otii application, changes the device.
+        The value of a successful setter is then cached as set, even if the device rounds or limits it,
+        so the getter returns the requested value instead of reading back the applied one.
 
     """
+    __slots__ = (
+        "type", "id", "name", "connection", "skip_redundant_writes",
+        "_id_data", "_encoded_requests", "_cache", "_cache_enabled", "_batching",
+        "_no_wait",
+    )
+
     def __init__(self, device_dict, connection):
         """
         Args:
             device_dict (dict): Dictionary with Arc parameters.
-            connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
+            connection (:obj:OtiiConnection): Object to handle connection to the Otii server,
+            or an :obj:OtiiConnectionPool to take a connection from.
 
         """
+        if isinstance(connection, otii_connection.OtiiConnectionPool):
+            connection = connection.next()
         self.type = device_dict["type"]
         self.id = device_dict["device_id"]
         self.name = device_dict["name"]
         self.connection = connection
+        self.skip_redundant_writes = False
+        self._id_data = {"device_id": self.id}
+        self._encoded_requests = {}
+        self._cache = {}
+        self._cache_enabled = True
+        self._batching = False
+        self._no_wait = False
+
+    def _request(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        self._invalidate(cmd)
+        request_data = self._id_data if data is None else {**self._id_data, **data}
+        return {"type": "request", "cmd": cmd, "data": request_data}
+
+    def _call(self, cmd, data=None, timeout=None):
+        # pylint: disable=missing-function-docstring
+        if self._batching and timeout is None and cmd not in COMMAND_TIMEOUTS:
+            result = BatchResult()
+            self.connection.queue(self._request(cmd, data), result.set_response)
+            return result
+        return self._call_now(cmd, data, timeout)
+
+    def _call_now(self, cmd, data=None, timeout=None):
+        # pylint: disable=missing-function-docstring
+        # The request without arguments only depends on the device id, encode it once per command,
+        # together with the timeout of the command. Only the arguments are then encoded for each call.
+        self._invalidate(cmd)
+        template = self._encoded_requests.get(cmd)
+        if template is None:
+            template = (framing.dumps(self._request(cmd)), COMMAND_TIMEOUTS.get(cmd, DEFAULT_TIMEOUT))
+            self._encoded_requests[cmd] = template
+        encoded_request, command_timeout = template
+        if timeout is None:
+            timeout = command_timeout
+        if data:
+            encoded_request = framing.add_data(encoded_request, data)
+        response = self.connection.send_encoded_and_receive(encoded_request, timeout)
+        return otii_connection.response_data(response)
+
+    def _cached_call(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        if not self._cache_enabled or self._batching:
+            return self._call(cmd, data)
+        cached = self._cache.setdefault(cmd, {})
+        key = None if data is None else tuple(data.values())
+        if key not in cached:
+            cached[key] = self._call(cmd, data)
+        return cached[key]
+
+    def _invalidate(self, cmd):
+        # pylint: disable=missing-function-docstring
+        if cmd in CLEARS_CACHE:
+            self._cache.clear()
+        else:
+            for getter in INVALIDATES.get(cmd, ()):
+                self._cache.pop(getter, None)
+
+    def _cache_key(self, cmd, data):
+        # pylint: disable=missing-function-docstring
+        getter, key = WRITES_THROUGH[cmd]
+        args = tuple(value for name, value in data.items() if name != key)
+        return getter, args or None, key
+
+    def _is_set(self, cmd, data):
+        # pylint: disable=missing-function-docstring
+        if cmd not in WRITES_THROUGH or not self._cache_enabled or not self.skip_redundant_writes:
+            return False
+        getter, args, key = self._cache_key(cmd, data)
+        cached = self._cache.get(getter, {}).get(args)
+        return cached is not None and cached[key] == data[key]
+
+    def _write_through(self, cmd, data):
+        # pylint: disable=missing-function-docstring
+        # A getter read while the setter was pending may have cached the old value
+        self._invalidate(cmd)
+        if cmd in WRITES_THROUGH and self._cache_enabled and self.skip_redundant_writes:
+            getter, args, key = self._cache_key(cmd, data)
+            self._cache.setdefault(getter, {})[args] = {key: data[key]}
+
+    def _send(self, cmd, data=None, wait=True):
+        # pylint: disable=missing-function-docstring
+        if self._is_set(cmd, data):
+            return
+        if self.connection.pipelining:
+            self.connection.queue(self._request(cmd, data))
+        elif not wait or self._no_wait or self.connection.bursting:
+            self.connection.send_nowait(self._request(cmd, data))
+        else:
+            self._call(cmd, data)
+            # The value is only known to be set when the response has been checked
+            if not self._batching:
+                self._write_through(cmd, data)
+
+    def _call_many(self, requests, timeout=3):
+        # pylint: disable=missing-function-docstring
+        responses = self.connection.send_and_receive_many(requests, timeout)
+        return [otii_connection.response_data(response) for response in responses]
 
     def add_to_project(self):
         """ Add device to current project.
 
         """
-        data = {
-            "device_id": self.id,
-        }
-        request = {
-            "type": "request",
-            "cmd": "arc_add_to_project",
-            "data": data,
-        }
-        response = self.connection.send_and_receive(request, 10)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._call("arc_add_to_project")
+
+    def pipeline(self):
+        """ Context manager that sends commands together, instead of one at a time.
+
+        Commands that do not return a value are held back inside the context,
+        and sent all at once when leaving it. A command that returns a value
+        sends the held back commands together with itself.
+        Errors for held back commands are raised when they are sent.
+
+        .. code-block:: python
+
+            with arc.pipeline():
+                arc.set_main_voltage(3.3)
+                arc.set_max_current(0.5)
+                arc.enable_channel("mc", True)
+
+        Returns:
+            Context manager for the pipeline.
+
+        """
+        return self.connection.pipeline()
+
+    def flush(self):
+        """ Wait for the responses of commands sent with wait = False.
+
+        Raises:
+            Otii_Exception: If one of the commands failed.
+
+        """
+        self.connection.flush()
+
+    def cache_clear(self):
+        """ Forget cached getter values, e.g. when the device has been reconnected.
+
+        """
+        self._cache.clear()
+
+    def cache_disable(self):
+        """ Stop caching getter values, and always ask the server.
+
+        Values that only change when set through this object, e.g. the max current,
+        the range and the versions, are otherwise cached. With skip_redundant_writes,
+        setters are also skipped when the cached value is already the value to set.
+        Disable the cache if the device is also controlled by other clients.
+
+        """
+        self._cache_enabled = False
+        self._cache.clear()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """ Context manager that sends all commands together, including commands that return a value.
+
+        Inside the context, commands that return a value return a :obj:BatchResult instead.
+        Call its result method to get the value, when the context has been left.
+        Commands with long timeouts, and set_supply_battery_emulator, are sent immediately,
+        together with the commands before them.
+        If a command failed, the error is raised when leaving the context.
+
+        .. code-block:: python
+
+            with arc.batch():
+                arc.set_main_voltage(3.3)
+                voltage = arc.get_main_voltage()
+                max_current = arc.get_max_current()
+            print(voltage.result(), max_current.result())
+
+        """
+        if self._batching:
+            yield
+            return
+        self._batching = True
+        try:
+            with self.connection.pipeline():
+                yield
+        finally:
+            self._batching = False
+
+    @contextlib.contextmanager
+    def fire_and_forget(self):
+        """ Context manager that sends commands without waiting for their responses.
+
+        Inside the context, commands that do not return a value are sent immediately,
+        as with wait = False. The responses are checked when a command that returns
+        a value is sent, or when leaving the context.
+
+        .. code-block:: python
+
+            with arc.fire_and_forget():
+                for value in range(10):
+                    arc.set_gpo(1, value % 2 == 0)
+
+        """
+        no_wait = self._no_wait
+        self._no_wait = True
+        try:
+            yield
+        finally:
+            self._no_wait = no_wait
+        self.connection.flush()
 
     def calibrate(self):
         """ Perform internal calibration of an Arc device.
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_calibrate", "data": data}
-        response = self.connection.send_and_receive(request, 10)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._call("arc_calibrate")
 
-    def enable_5v(self, enable):
+    def configure(self,
+                  channels = None,
+                  enable_5v = None,
+                  enable_uart = None,
+                  exp_port = None,
+                  main_voltage = None,
+                  max_current = None,
+                  ):
+        """ Configure several settings of the device in one round trip.
+
+        All requests are sent at once, instead of waiting for the response of each request
+        before sending the next one. Settings that are None are left unchanged.
+
+        Args:
+            channels (dict, optional): Channel names mapped to True to enable, False to disable.
+            enable_5v (bool, optional): True to enable 5V, False to disable.
+            enable_uart (bool, optional): True to enable UART, False to disable.
+            exp_port (bool, optional): True to enable expansion port, False to disable.
+            main_voltage (float, optional): Value to set main voltage to (V).
+            max_current (float, optional): Value to set max current to, value should be between 0.001-5 (A).
+
+        """
+        if max_current is not None:
+            check_range("max_current", max_current, 0.001, 5)
+        requests = []
+        for channel, enable in (channels or {}).items():
+            requests.append(self._request("arc_enable_channel", {"channel": channel, "enable": enable}))
+        for cmd, key, value in (
+            ("arc_enable_5v", "enable", enable_5v),
+            ("arc_enable_uart", "enable", enable_uart),
+            ("arc_enable_exp_port", "enable", exp_port),
+            ("arc_set_main_voltage", "value", main_voltage),
+            ("arc_set_max_current", "value", max_current),
+        ):
+            if value is not None:
+                requests.append(self._request(cmd, {key: value}))
+        if requests:
+            self._call_many(requests)
+
+    def enable_5v(self, enable, wait = True):
         """ Enable or disable 5V pin.
 
         Args:
             enable (bool): True to enable 5V, False to disable.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "arc_enable_5v", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_enable_5v", {"enable": enable}, wait)
 
-    def enable_battery_profiling(self, enable):
+    def enable_battery_profiling(self, enable, wait = True):
         """ This will start the discharge profiling of a connected battery.
 
         Args:
             enable (bool): True to start battery profiling, False to stop.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "arc_enable_battery_profiling", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_enable_battery_profiling", {"enable": enable}, wait)
 
-    def enable_channel(self, channel, enable):
+    def enable_channel(self, channel, enable, wait = True):
         """ Enable or disable measurement channel.
 
         Args:
             channel (str): Name of the channel to enable or disable.
             enable (bool): True to enable channel, False to disable.
+            wait (bool, optional): False to return without waiting for the response, default True.
+
+        """
+        self._send("arc_enable_channel", {"channel": channel, "enable": enable}, wait)
+
+    def enable_channels(self, channels):
+        """ Enable or disable several measurement channels in one round trip.
+
+        Args:
+            channels (dict): Channel names mapped to True to enable, False to disable.
 
         """
-        data = {"device_id": self.id, "channel": channel, "enable": enable}
-        request = {"type": "request", "cmd": "arc_enable_channel", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.configure(channels = channels)
 
-    def enable_exp_port(self, enable):
+    def enable_exp_port(self, enable, wait = True):
         """ Enable expansion port.
 
         Args:
             enable (bool): True to enable expansion port, False to disable.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "arc_enable_exp_port", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_enable_exp_port", {"enable": enable}, wait)
 
-    def enable_uart(self, enable):
+    def enable_uart(self, enable, wait = True):
         """ Enable UART.
 
         Args:
             enable (bool): True to enable UART, False to disable.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "arc_enable_uart", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_enable_uart", {"enable": enable}, wait)
 
     def get_4wire(self):
         """ Get the 4-wire measurement state.
@@ -126,12 +498,7 @@ class Arc:
             str: The current state, "cal_invalid", "disabled", "inactive" or "active".
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_4wire", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("arc_get_4wire")["value"]
 
     def get_adc_resistor(self):
         """ Get adc resistor value.
@@ -140,12 +507,7 @@ class Arc:
             float: ADC resistor value (Ohm).
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_adc_resistor", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._cached_call("arc_get_adc_resistor")["value"]
 
     def get_channel_samplerate(self, channel):
         """ Get channel sample rate.
@@ -157,12 +519,7 @@ class Arc:
             int: Sample rate for channel
 
         """
-        data = {"device_id": self.id, "channel": channel}
-        request = {"type": "request", "cmd": "arc_get_channel_samplerate", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._cached_call("arc_get_channel_samplerate", {"channel": channel})["value"]
 
     def get_exp_voltage(self):
         """ Get the voltage of the expansion port.
@@ -171,12 +528,7 @@ class Arc:
             float: Voltage value on the expansion port (V).
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_exp_voltage", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("arc_get_exp_voltage")["value"]
 
     def get_gpi(self, pin):
         """ Get the state of one of the GPI pins.
@@ -188,12 +540,8 @@ class Arc:
             bool: State of the GPI pin.
 
         """
-        data = {"device_id": self.id, "pin": pin}
-        request = {"type": "request", "cmd": "arc_get_gpi", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        check_pin(pin)
+        return self._call("arc_get_gpi", {"pin": pin})["value"]
 
     def get_main(self):
         """ Get the state of the main power.
@@ -202,12 +550,7 @@ class Arc:
             bool: State of the main power.
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_main", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("arc_get_main")["value"]
 
     def get_main_voltage(self):
         """ Get main voltage value.
@@ -216,12 +559,7 @@ class Arc:
             float: Main voltage value (V).
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_main_voltage", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("arc_get_main_voltage")["value"]
 
     def get_max_current(self):
         """ Get the max allowed current.
@@ -230,12 +568,7 @@ class Arc:
             float: Value max current is set to (A).
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_max_current", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._cached_call("arc_get_max_current")["value"]
 
     def get_range(self):
         """ Get the current measurement range on the main output.
@@ -244,12 +577,7 @@ class Arc:
             str: Current measurement range mode on main, "low" or "high".
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_range", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["range"]
+        return self._cached_call("arc_get_range")["range"]
 
     def get_rx(self):
         """ The RX pin can be used as a GPI when the UART is disabled.
@@ -258,12 +586,7 @@ class Arc:
             bool: State of the RX pin.
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_rx", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("arc_get_rx")["value"]
 
     def get_src_cur_limit_enabled(self):
         """ Get current state of voltage source current limiting.
@@ -272,12 +595,7 @@ class Arc:
             bool: True if set to constant current, false if set to cut-off.
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_src_cur_limit_enabled", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["enabled"]
+        return self._call("arc_get_src_cur_limit_enabled")["enabled"]
 
     def get_supply_mode(self):
         """ Get current supply mode
@@ -286,16 +604,7 @@ class Arc:
             string: "power-box" or "battery-emulator"
 
         """
-        data = {"device_id": self.id}
-        request = {
-            "type": "request",
-            "cmd": "arc_get_supply_mode",
-            "data": data,
-        }
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["supply_mode"]
+        return self._cached_call("arc_get_supply_mode")["supply_mode"]
 
     def get_uart_baudrate(self):
         """ Get the UART baud rate.
@@ -304,12 +613,7 @@ class Arc:
             int: Value UART baud rate is set to.
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_uart_baudrate", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._cached_call("arc_get_uart_baudrate")["value"]
 
     def get_value(self, channel):
         """ Get value from specified channel.
@@ -322,26 +626,31 @@ class Arc:
             float: Present value in the channel (A/V/°C/Digital).
 
         """
-        data = {"device_id": self.id, "channel": channel}
-        request = {"type": "request", "cmd": "arc_get_value", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("arc_get_value", {"channel": channel})["value"]
+
+    def get_values(self, channels):
+        """ Get values from several channels in one round trip.
+        This is not available for the rx channel.
+
+        Args:
+            channels (list): Names of the channels to get values from.
+
+        Returns:
+            dict: Channel names mapped to the present value in the channel (A/V/°C/Digital).
+
+        """
+        requests = [self._request("arc_get_value", {"channel": channel}) for channel in channels]
+        values = [response_data["value"] for response_data in self._call_many(requests)]
+        return dict(zip(channels, values))
 
     def get_version(self):
         """ Get hardware and firmware versions of device.
 
         Returns:
-            dict: Dictionary including keys hw_version (str) and fw_version (str).
+            :obj:Version: Named tuple with hw_version (str) and fw_version (str).
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_get_version", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]
+        return convert(self._cached_call("arc_get_version"), Version.from_data)
 
     def is_connected(self):
         """ Check if a device is connected.
@@ -350,184 +659,158 @@ class Arc:
             bool: True if device is connected, False otherwise.
 
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_is_connected", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["connected"]
+        return self._call("arc_is_connected")["connected"]
 
-    def set_4wire(self, enable):
+    def set_4wire(self, enable, wait = True):
         """ Enable/disable 4-wire measurements using Sense+/-.
 
         Args:
             enable (bool): True to enable 4-wire, false to disable
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "arc_set_4wire", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_4wire", {"enable": enable}, wait)
 
-    def set_adc_resistor(self, value):
+    def set_adc_resistor(self, value, wait = True):
         """ Set the value of the shunt resistor for the ADC.
 
         Args:
             value (float): Value to set ADC resistor to, value should be between 0.001-22 (Ohm).
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_adc_resistor", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        check_range("value", value, 0.001, 22)
+        self._send("arc_set_adc_resistor", {"value": value}, wait)
 
-    def set_battery_profile(self, value):
+    def set_battery_profile(self, value, wait = True):
         """ Set the battery profile.
 
         Args:
             value (list): The list of battery profile step dicts (max 10).
             Each dict is of the { "current|resistance|power" : SI value, "duration" : seconds } form.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_battery_profile", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_battery_profile", {"value": value}, wait)
 
-    def set_channel_samplerate(self, channel, value):
+    def set_channel_samplerate(self, channel, value, wait = True):
         """ Set the sample rate of a channel
 
         Args:
             channel (str): Name of the channel to set the sample rate for.
             value (int): The sample rate to set
+            wait (bool, optional): False to return without waiting for the response, default True.
+
+        """
+        self._send("arc_set_channel_samplerate", {"channel": channel, "value": value}, wait)
+
+    def set_channel_samplerates(self, samplerates):
+        """ Set the sample rate of several channels in one round trip.
+
+        Args:
+            samplerates (dict): Channel names mapped to the sample rate to set.
 
         """
-        data = {"device_id": self.id, "channel": channel, "value": value}
-        request = {"type": "request", "cmd": "arc_set_channel_samplerate", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        requests = [
+            self._request("arc_set_channel_samplerate", {"channel": channel, "value": value})
+            for channel, value in samplerates.items()
+        ]
+        if requests:
+            self._call_many(requests)
 
-    def set_exp_voltage(self, value):
+    def set_exp_voltage(self, value, wait = True):
         """ Set the voltage of the expansion port.
 
         Args:
             value (float): Value to set expansion port voltage to, value should be between 1.2-5 (V).
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_exp_voltage", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        check_range("value", value, 1.2, 5)
+        self._send("arc_set_exp_voltage", {"value": value}, wait)
 
-    def set_gpo(self, pin, value):
+    def set_gpo(self, pin, value, wait = True):
         """ Set the state of one of the GPO pins.
 
         Args:
             pin (int): ID of the GPO pin to set state of, 1 or 2.
             value (bool): True to enable GPO output, False to disable.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "pin": pin, "value": value}
-        request = {"type": "request", "cmd": "arc_set_gpo", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        check_pin(pin)
+        self._send("arc_set_gpo", {"pin": pin, "value": value}, wait)
 
-    def set_main(self, enable):
+    def set_main(self, enable, wait = True):
         """ Turn on or off main power on a device.
 
         Args:
             enable (bool): True to turn on main power, False to turn off.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "arc_set_main", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_main", {"enable": enable}, wait)
 
-    def set_main_current(self, value):
+    def set_main_current(self, value, wait = True):
         """ Set the main current on Arc. Used when the Otii device is set in constant current mode.
 
         Args:
             value (float): Current to set in (A).
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_main_current", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_main_current", {"value": value}, wait)
 
-    def set_main_voltage(self, value):
+    def set_main_voltage(self, value, wait = True):
         """ Get data entries from a specified channel of a specific recording.
 
         Args:
             value (float): Value to set main voltage to (V).
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_main_voltage", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_main_voltage", {"value": value}, wait)
 
-    def set_max_current(self, value):
+    def set_max_current(self, value, wait = True):
         """ When the current exceeds this value, the main power will cut off.
 
         Args:
             value (float): Value to set max current to, value should be between 0.001-5 (A).
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_max_current", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        check_range("value", value, 0.001, 5)
+        self._send("arc_set_max_current", {"value": value}, wait)
 
-    def set_power_regulation(self, mode):
+    def set_power_regulation(self, mode, wait = True):
         """ Set power regulation mode.
 
         Args:
             mode (float): One of the following: "voltage", "current", "off".
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "mode": mode}
-        request = {"type": "request", "cmd": "arc_set_power_regulation", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_power_regulation", {"mode": mode}, wait)
 
-    def set_range(self, range):
+    def set_range(self, mode, wait = True):
         """ Set the main outputs measurement range.
 
         Args:
-            range (str): Current measurement range mode to set on main. "low" enables auto-range, "high" force high-range.
+            mode (str): Current measurement range mode to set on main. "low" enables auto-range, "high" force high-range.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "range": range}
-        request = {"type": "request", "cmd": "arc_set_range", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_range", {"range": mode}, wait)
 
-    def set_src_cur_limit_enabled(self, enable):
+    def set_src_cur_limit_enabled(self, enable, wait = True):
         """ Enable voltage source current limit (CC) operation.
 
         Args:
             enable (bool): True means enable constant current, false means cut-off.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "arc_set_src_cur_limit_enabled", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_src_cur_limit_enabled", {"enable": enable}, wait)
 
     def set_supply_battery_emulator(
         self,
@@ -557,7 +840,6 @@ class Arc:
 
         """
         data = {
-            "device_id": self.id,
             "battery_profile_id": battery_profile_id,
             "series": series,
             "parallel": parallel,
@@ -565,50 +847,33 @@ class Arc:
             "soc": soc,
             "soc_tracking": soc_tracking,
         }
-        request = {
-            "type": "request",
-            "cmd": "arc_set_supply_battery_emulator",
-            "data": data,
-        }
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return battery_emulator.BatteryEmulator(response["data"]["battery_emulator_id"], self.connection)
+        response_data = self._call_now("arc_set_supply_battery_emulator", data)
+        return battery_emulator.BatteryEmulator(response_data["battery_emulator_id"], self.connection)
 
     def set_supply_power_box(self):
         """ Set power supply to power box.
         """
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_set_supply_power_box", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_supply_power_box")
 
-    def set_tx(self, value):
+    def set_tx(self, value, wait = True):
         """ The TX pin can be used as a GPO when the UART is disabled.
 
         Args:
             value (bool): True to enable TX output, False to disable.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_tx", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_tx", {"value": value}, wait)
 
-    def set_uart_baudrate(self, value):
+    def set_uart_baudrate(self, value, wait = True):
         """ Set UART baud rate.
 
         Args:
             value (int): Value to set UART baud rate to.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_set_uart_baudrate", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_uart_baudrate", {"value": value}, wait)
 
     def wait_for_battery_data(self, timeout):
         """ Wait for battery data.
@@ -621,50 +886,58 @@ class Arc:
                            the total discharge of the battery since profiling start.
 
         """
-        data = {"device_id": self.id, "timeout": timeout}
-        request = {"type": "request", "cmd": "arc_wait_for_battery_data", "data": data}
-        response = self.connection.send_and_receive(request, 60 + (timeout / 1000))
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        response_data = self._call("arc_wait_for_battery_data", {"timeout": timeout}, timeout=60 + (timeout / 1000))
+        return response_data["value"]
 
-    def write_tx(self, value):
+    def write_tx(self, value, wait = True):
         """ Write data to TX.
 
         Args:
             value (str): Data to write to TX.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"device_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "arc_write_tx", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_write_tx", {"value": value}, wait)
 
     def get_property(self, name):
         # pylint: disable=missing-function-docstring
-        data = {"device_id": self.id, "name": name}
-        request = {"type": "request", "cmd": "arc_get_property", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"].get("value", None)
+        return self._call("arc_get_property", {"name": name}).get("value", None)
 
     def set_property(self, name, value):
         # pylint: disable=missing-function-docstring
-        data = {"device_id": self.id, "name": name, "value": value}
-        request = {"type": "request", "cmd": "arc_set_property", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_set_property", {"name": name, "value": value})
 
     def commit(self):
         # pylint: disable=missing-function-docstring
-        data = {"device_id": self.id}
-        request = {"type": "request", "cmd": "arc_commit", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("arc_commit")
+
+    def get_properties(self, names):
+        """ Get several properties in one round trip.
+
+        Args:
+            names (list): Names of the properties to get.
+
+        Returns:
+            dict: Property names mapped to their values, None for unknown properties.
+
+        """
+        requests = [self._request("arc_get_property", {"name": name}) for name in names]
+        values = [response_data.get("value", None) for response_data in self._call_many(requests)]
+        return dict(zip(names, values))
+
+    def set_properties(self, properties, commit = True):
+        """ Set several properties in one round trip.
+
+        Args:
+            properties (dict): Property names mapped to the values to set.
+            commit (bool, optional): True to commit the properties when set, default True.
+
+        """
+        with self.pipeline():
+            for name, value in properties.items():
+                self.set_property(name, value)
+            if commit:
+                self.commit()
 
     def firmware_upgrade(self, filename = None):
         """ Initiate device firmware update.
@@ -673,8 +946,30 @@ class Arc:
             filename (str, optional): Firmware filename.
 
         """
-        data = {"device_id": self.id, "filename": filename}
-        request = {"type": "request", "cmd": "arc_firmware_upgrade", "data": data}
-        response = self.connection.send_and_receive(request, 15)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._call("arc_firmware_upgrade", {"filename": filename})
+
+def add_all_to_project(arcs):
+    """ Add several devices to the current project.
+
+    The requests of devices sharing a connection are sent together, and devices
+    with connections of their own, e.g. from an :obj:OtiiConnectionPool, are added in parallel.
+
+    Args:
+        arcs (list): Arc objects to add.
+
+    """
+    # pylint: disable=protected-access
+    groups = {}
+    for device in arcs:
+        groups.setdefault(device.connection, []).append(device)
+
+    def add(devices):
+        requests = [device._request("arc_add_to_project") for device in devices]
+        devices[0]._call_many(requests, COMMAND_TIMEOUTS["arc_add_to_project"])
+
+    if len(groups) <= 1:
+        for devices in groups.values():
+            add(devices)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(len(groups)) as executor:
+            list(executor.map(add, groups.values()))
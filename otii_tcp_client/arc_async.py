@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+#coding: utf-8
+# pylint: disable=missing-module-docstring
+
+import asyncio
+from otii_tcp_client import arc, battery_emulator_async, framing, otii_connection
+
+class AsyncArc:
+    """ Class to define an Arc or Ace device controlled using asyncio.
+        Includes the same operations as :obj:Arc, as coroutines.
+
+        Responses are matched to requests by trans_id, so long running commands
+        like wait_for_battery_data, calibrate and firmware_upgrade only suspend the
+        coroutine awaiting them. Other devices and tasks can use the connection meanwhile.
+
+    Attributes:
+        type (str): Device type, "Arc" for Arc devices.
+        id (str): ID of the Arc device.
+        name (str): Name of the Arc device.
+        connection (:obj:AsyncOtiiConnection): Object to handle connection to the Otii server.
+        skip_redundant_writes (bool): True to skip setters when the cached value is already the value to set,
+        default False. Only enable it if no other client, or the Otii application, changes the device.
+        The value of a successful setter is then cached as set, even if the device rounds or limits it,
+        so the getter returns the requested value instead of reading back the applied one.
+
+    """
+    __slots__ = (
+        "type", "id", "name", "connection", "skip_redundant_writes",
+        "_id_data", "_encoded_requests", "_cache", "_cache_enabled",
+    )
+
+    def __init__(self, device_dict, connection):
+        """
+        Args:
+            device_dict (dict): Dictionary with Arc parameters.
+            connection (:obj:AsyncOtiiConnection): Object to handle connection to the Otii server.
+
+        """
+        self.type = device_dict["type"]
+        self.id = device_dict["device_id"]
+        self.name = device_dict["name"]
+        self.connection = connection
+        self.skip_redundant_writes = False
+        self._id_data = {"device_id": self.id}
+        self._encoded_requests = {}
+        self._cache = {}
+        self._cache_enabled = True
+
+    def _request(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        self._invalidate(cmd)
+        request_data = self._id_data if data is None else {**self._id_data, **data}
+        return {"type": "request", "cmd": cmd, "data": request_data}
+
+    async def _call(self, cmd, data=None, timeout=None):
+        # pylint: disable=missing-function-docstring
+        # Requests are encoded once per command, together with the timeout of the command.
+        # Only the arguments are encoded for each call.
+        self._invalidate(cmd)
+        template = self._encoded_requests.get(cmd)
+        if template is None:
+            template = (framing.dumps(self._request(cmd)), arc.COMMAND_TIMEOUTS.get(cmd, arc.DEFAULT_TIMEOUT))
+            self._encoded_requests[cmd] = template
+        encoded_request, command_timeout = template
+        if timeout is None:
+            timeout = command_timeout
+        if data:
+            encoded_request = framing.add_data(encoded_request, data)
+        response = await self.connection.send_encoded_and_receive(encoded_request, timeout)
+        return otii_connection.response_data(response)
+
+    async def _cached_call(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        if not self._cache_enabled:
+            return await self._call(cmd, data)
+        cached = self._cache.setdefault(cmd, {})
+        key = None if data is None else tuple(data.values())
+        if key not in cached:
+            cached[key] = await self._call(cmd, data)
+        return cached[key]
+
+    def _invalidate(self, cmd):
+        # pylint: disable=missing-function-docstring
+        if cmd in arc.CLEARS_CACHE:
+            self._cache.clear()
+        else:
+            for getter in arc.INVALIDATES.get(cmd, ()):
+                self._cache.pop(getter, None)
+
+    def _cache_key(self, cmd, data):
+        # pylint: disable=missing-function-docstring
+        getter, key = arc.WRITES_THROUGH[cmd]
+        args = tuple(value for name, value in data.items() if name != key)
+        return getter, args or None, key
+
+    def _is_set(self, cmd, data):
+        # pylint: disable=missing-function-docstring
+        if cmd not in arc.WRITES_THROUGH or not self._cache_enabled or not self.skip_redundant_writes:
+            return False
+        getter, args, key = self._cache_key(cmd, data)
+        cached = self._cache.get(getter, {}).get(args)
+        return cached is not None and cached[key] == data[key]
+
+    async def _send(self, cmd, data):
+        # pylint: disable=missing-function-docstring
+        if self._is_set(cmd, data):
+            return
+        await self._call(cmd, data)
+        # A getter read while the setter was pending may have cached the old value
+        self._invalidate(cmd)
+        if cmd in arc.WRITES_THROUGH and self._cache_enabled and self.skip_redundant_writes:
+            getter, args, key = self._cache_key(cmd, data)
+            self._cache.setdefault(getter, {})[args] = {key: data[key]}
+
+    async def add_to_project(self):
+        """ Add device to current project.
+
+        """
+        await self._call("arc_add_to_project")
+
+    def cache_clear(self):
+        """ Forget cached getter values, e.g. when the device has been reconnected.
+
+        """
+        self._cache.clear()
+
+    def cache_disable(self):
+        """ Stop caching getter values, and always ask the server.
+
+        The same values as for :obj:Arc are otherwise cached, and with skip_redundant_writes
+        setters are skipped when the cached value is already the value to set. Disable the cache
+        if the device is also controlled by other clients.
+
+        """
+        self._cache_enabled = False
+        self._cache.clear()
+
+    async def calibrate(self):
+        """ Perform internal calibration of an Arc device.
+
+        """
+        await self._call("arc_calibrate")
+
+    async def configure(self,
+                        channels = None,
+                        enable_5v = None,
+                        enable_uart = None,
+                        exp_port = None,
+                        main_voltage = None,
+                        max_current = None,
+                        ):
+        """ Configure several settings of the device concurrently.
+
+        All requests are sent at once, instead of waiting for the response of each request
+        before sending the next one. Settings that are None are left unchanged.
+
+        Args:
+            channels (dict, optional): Channel names mapped to True to enable, False to disable.
+            enable_5v (bool, optional): True to enable 5V, False to disable.
+            enable_uart (bool, optional): True to enable UART, False to disable.
+            exp_port (bool, optional): True to enable expansion port, False to disable.
+            main_voltage (float, optional): Value to set main voltage to (V).
+            max_current (float, optional): Value to set max current to, value should be between 0.001-5 (A).
+
+        """
+        if max_current is not None:
+            arc.check_range("max_current", max_current, 0.001, 5)
+        calls = []
+        for channel, enable in (channels or {}).items():
+            calls.append(self._call("arc_enable_channel", {"channel": channel, "enable": enable}))
+        for cmd, key, value in (
+            ("arc_enable_5v", "enable", enable_5v),
+            ("arc_enable_uart", "enable", enable_uart),
+            ("arc_enable_exp_port", "enable", exp_port),
+            ("arc_set_main_voltage", "value", main_voltage),
+            ("arc_set_max_current", "value", max_current),
+        ):
+            if value is not None:
+                calls.append(self._call(cmd, {key: value}))
+        await asyncio.gather(*calls)
+
+    async def enable_5v(self, enable):
+        """ Enable or disable 5V pin.
+
+        Args:
+            enable (bool): True to enable 5V, False to disable.
+
+        """
+        await self._call("arc_enable_5v", {"enable": enable})
+
+    async def enable_battery_profiling(self, enable):
+        """ This will start the discharge profiling of a connected battery.
+
+        Args:
+            enable (bool): True to start battery profiling, False to stop.
+
+        """
+        await self._call("arc_enable_battery_profiling", {"enable": enable})
+
+    async def enable_channel(self, channel, enable):
+        """ Enable or disable measurement channel.
+
+        Args:
+            channel (str): Name of the channel to enable or disable.
+            enable (bool): True to enable channel, False to disable.
+
+        """
+        await self._call("arc_enable_channel", {"channel": channel, "enable": enable})
+
+    async def enable_channels(self, channels):
+        """ Enable or disable several measurement channels concurrently.
+
+        Args:
+            channels (dict): Channel names mapped to True to enable, False to disable.
+
+        """
+        await self.configure(channels = channels)
+
+    async def enable_exp_port(self, enable):
+        """ Enable expansion port.
+
+        Args:
+            enable (bool): True to enable expansion port, False to disable.
+
+        """
+        await self._call("arc_enable_exp_port", {"enable": enable})
+
+    async def enable_uart(self, enable):
+        """ Enable UART.
+
+        Args:
+            enable (bool): True to enable UART, False to disable.
+
+        """
+        await self._call("arc_enable_uart", {"enable": enable})
+
+    async def get_4wire(self):
+        """ Get the 4-wire measurement state.
+
+        Returns:
+            str: The current state, "cal_invalid", "disabled", "inactive" or "active".
+
+        """
+        response_data = await self._call("arc_get_4wire")
+        return response_data["value"]
+
+    async def get_adc_resistor(self):
+        """ Get adc resistor value.
+
+        Returns:
+            float: ADC resistor value (Ohm).
+
+        """
+        response_data = await self._cached_call("arc_get_adc_resistor")
+        return response_data["value"]
+
+    async def get_channel_samplerate(self, channel):
+        """ Get channel sample rate.
+
+        Args:
+            channel (str): Name of the channel to get the sample rate for.
+
+        Returns:
+            int: Sample rate for channel
+
+        """
+        response_data = await self._cached_call("arc_get_channel_samplerate", {"channel": channel})
+        return response_data["value"]
+
+    async def get_exp_voltage(self):
+        """ Get the voltage of the expansion port.
+
+        Returns:
+            float: Voltage value on the expansion port (V).
+
+        """
+        response_data = await self._call("arc_get_exp_voltage")
+        return response_data["value"]
+
+    async def get_gpi(self, pin):
+        """ Get the state of one of the GPI pins.
+
+        Args:
+            pin (int): ID of the GPI pin to get state of, 1 or 2.
+
+        Returns:
+            bool: State of the GPI pin.
+
+        """
+        arc.check_pin(pin)
+        response_data = await self._call("arc_get_gpi", {"pin": pin})
+        return response_data["value"]
+
+    async def get_main(self):
+        """ Get the state of the main power.
+
+        Returns:
+            bool: State of the main power.
+
+        """
+        response_data = await self._call("arc_get_main")
+        return response_data["value"]
+
+    async def get_main_voltage(self):
+        """ Get main voltage value.
+
+        Returns:
+            float: Main voltage value (V).
+
+        """
+        response_data = await self._call("arc_get_main_voltage")
+        return response_data["value"]
+
+    async def get_max_current(self):
+        """ Get the max allowed current.
+
+        Returns:
+            float: Value max current is set to (A).
+
+        """
+        response_data = await self._cached_call("arc_get_max_current")
+        return response_data["value"]
+
+    async def get_range(self):
+        """ Get the current measurement range on the main output.
+
+        Returns:
+            str: Current measurement range mode on main, "low" or "high".
+
+        """
+        response_data = await self._cached_call("arc_get_range")
+        return response_data["range"]
+
+    async def get_rx(self):
+        """ The RX pin can be used as a GPI when the UART is disabled.
+
+        Returns:
+            bool: State of the RX pin.
+
+        """
+        response_data = await self._call("arc_get_rx")
+        return response_data["value"]
+
+    async def get_src_cur_limit_enabled(self):
+        """ Get current state of voltage source current limiting.
+
+        Returns:
+            bool: True if set to constant current, false if set to cut-off.
+
+        """
+        response_data = await self._call("arc_get_src_cur_limit_enabled")
+        return response_data["enabled"]
+
+    async def get_supply_mode(self):
+        """ Get current supply mode
+
+        Returns:
+            string: "power-box" or "battery-emulator"
+
+        """
+        response_data = await self._cached_call("arc_get_supply_mode")
+        return response_data["supply_mode"]
+
+    async def get_uart_baudrate(self):
+        """ Get the UART baud rate.
+
+        Returns:
+            int: Value UART baud rate is set to.
+
+        """
+        response_data = await self._cached_call("arc_get_uart_baudrate")
+        return response_data["value"]
+
+    async def get_value(self, channel):
+        """ Get value from specified channel.
+        This is not available for the rx channel.
+
+        Args:
+            channel (str): Name of the channel to get value from.
+
+        Returns:
+            float: Present value in the channel (A/V/°C/Digital).
+
+        """
+        response_data = await self._call("arc_get_value", {"channel": channel})
+        return response_data["value"]
+
+    async def get_values(self, channels):
+        """ Get values from several channels concurrently.
+        This is not available for the rx channel.
+
+        Args:
+            channels (list): Names of the channels to get values from.
+
+        Returns:
+            dict: Channel names mapped to the present value in the channel (A/V/°C/Digital).
+
+        """
+        values = await asyncio.gather(*(self.get_value(channel) for channel in channels))
+        return dict(zip(channels, values))
+
+    async def get_version(self):
+        """ Get hardware and firmware versions of device.
+
+        Returns:
+            :obj:Version: Named tuple with hw_version (str) and fw_version (str).
+
+        """
+        return arc.Version.from_data(await self._cached_call("arc_get_version"))
+
+    async def is_connected(self):
+        """ Check if a device is connected.
+
+        Returns:
+            bool: True if device is connected, False otherwise.
+
+        """
+        response_data = await self._call("arc_is_connected")
+        return response_data["connected"]
+
+    async def set_4wire(self, enable):
+        """ Enable/disable 4-wire measurements using Sense+/-.
+
+        Args:
+            enable (bool): True to enable 4-wire, false to disable
+
+        """
+        await self._call("arc_set_4wire", {"enable": enable})
+
+    async def set_adc_resistor(self, value):
+        """ Set the value of the shunt resistor for the ADC.
+
+        Args:
+            value (float): Value to set ADC resistor to, value should be between 0.001-22 (Ohm).
+
+        """
+        arc.check_range("value", value, 0.001, 22)
+        await self._send("arc_set_adc_resistor", {"value": value})
+
+    async def set_battery_profile(self, value):
+        """ Set the battery profile.
+
+        Args:
+            value (list): The list of battery profile step dicts (max 10).
+            Each dict is of the { "current|resistance|power" : SI value, "duration" : seconds } form.
+
+        """
+        await self._call("arc_set_battery_profile", {"value": value})
+
+    async def set_channel_samplerate(self, channel, value):
+        """ Set the sample rate of a channel
+
+        Args:
+            channel (str): Name of the channel to set the sample rate for.
+            value (int): The sample rate to set
+
+        """
+        await self._send("arc_set_channel_samplerate", {"channel": channel, "value": value})
+
+    async def set_channel_samplerates(self, samplerates):
+        """ Set the sample rate of several channels concurrently.
+
+        Args:
+            samplerates (dict): Channel names mapped to the sample rate to set.
+
+        """
+        await asyncio.gather(*(
+            self._send("arc_set_channel_samplerate", {"channel": channel, "value": value})
+            for channel, value in samplerates.items()
+        ))
+
+    async def set_exp_voltage(self, value):
+        """ Set the voltage of the expansion port.
+
+        Args:
+            value (float): Value to set expansion port voltage to, value should be between 1.2-5 (V).
+
+        """
+        arc.check_range("value", value, 1.2, 5)
+        await self._call("arc_set_exp_voltage", {"value": value})
+
+    async def set_gpo(self, pin, value):
+        """ Set the state of one of the GPO pins.
+
+        Args:
+            pin (int): ID of the GPO pin to set state of, 1 or 2.
+            value (bool): True to enable GPO output, False to disable.
+
+        """
+        arc.check_pin(pin)
+        await self._call("arc_set_gpo", {"pin": pin, "value": value})
+
+    async def set_main(self, enable):
+        """ Turn on or off main power on a device.
+
+        Args:
+            enable (bool): True to turn on main power, False to turn off.
+
+        """
+        await self._call("arc_set_main", {"enable": enable})
+
+    async def set_main_current(self, value):
+        """ Set the main current on Arc. Used when the Otii device is set in constant current mode.
+
+        Args:
+            value (float): Current to set in (A).
+
+        """
+        await self._call("arc_set_main_current", {"value": value})
+
+    async def set_main_voltage(self, value):
+        """ Get data entries from a specified channel of a specific recording.
+
+        Args:
+            value (float): Value to set main voltage to (V).
+
+        """
+        await self._call("arc_set_main_voltage", {"value": value})
+
+    async def set_max_current(self, value):
+        """ When the current exceeds this value, the main power will cut off.
+
+        Args:
+            value (float): Value to set max current to, value should be between 0.001-5 (A).
+
+        """
+        arc.check_range("value", value, 0.001, 5)
+        await self._send("arc_set_max_current", {"value": value})
+
+    async def set_power_regulation(self, mode):
+        """ Set power regulation mode.
+
+        Args:
+            mode (float): One of the following: "voltage", "current", "off".
+
+        """
+        await self._call("arc_set_power_regulation", {"mode": mode})
+
+    async def set_range(self, mode):
+        """ Set the main outputs measurement range.
+
+        Args:
+            mode (str): Current measurement range mode to set on main. "low" enables auto-range, "high" force high-range.
+
+        """
+        await self._send("arc_set_range", {"range": mode})
+
+    async def set_src_cur_limit_enabled(self, enable):
+        """ Enable voltage source current limit (CC) operation.
+
+        Args:
+            enable (bool): True means enable constant current, false means cut-off.
+
+        """
+        await self._call("arc_set_src_cur_limit_enabled", {"enable": enable})
+
+    async def set_supply_battery_emulator(
+        self,
+        battery_profile_id,
+        *,
+        series = 1,
+        parallel = 1,
+        used_capacity = None,
+        soc = None,
+        soc_tracking = True,
+    ):
+        """ Set power supply to battery emulator.
+
+        It is only possible to set one of **used_capacity** and **soc**. If neither is set,
+        used_capacity is set to 0, and soc to 100.
+
+        Args:
+            battery_profile_id (string): Id of battery profile, as returned by otii.get_battery_profiles.
+            series (int, optional): Number of batteries in series, defaults to 1.
+            parallel (int, optional): Number of batteries in parallel, defaults to 1.
+            used_capacity (int, optional): Used capacity, defaults to 0.
+            soc (int, optional): State of Charge, defaults to 100.
+            soc_tracking (bool, optional): State of Charge tracking, defaults to True.
+
+        Returns:
+            :obj:AsyncBatteryEmulator: Battery emulator object.
+
+        """
+        data = {
+            "battery_profile_id": battery_profile_id,
+            "series": series,
+            "parallel": parallel,
+            "used_capacity": used_capacity,
+            "soc": soc,
+            "soc_tracking": soc_tracking,
+        }
+        response_data = await self._call("arc_set_supply_battery_emulator", data)
+        return battery_emulator_async.AsyncBatteryEmulator(response_data["battery_emulator_id"], self.connection)
+
+    async def set_supply_power_box(self):
+        """ Set power supply to power box.
+        """
+        await self._call("arc_set_supply_power_box")
+
+    async def set_tx(self, value):
+        """ The TX pin can be used as a GPO when the UART is disabled.
+
+        Args:
+            value (bool): True to enable TX output, False to disable.
+
+        """
+        await self._call("arc_set_tx", {"value": value})
+
+    async def set_uart_baudrate(self, value):
+        """ Set UART baud rate.
+
+        Args:
+            value (int): Value to set UART baud rate to.
+
+        """
+        await self._send("arc_set_uart_baudrate", {"value": value})
+
+    async def wait_for_battery_data(self, timeout):
+        """ Wait for battery data.
+
+        Args:
+            timeout (int): Maximum timeout in ms. May time out earlier if another Arc is returning battery data.
+        Returns:
+            dict: Battery data dict or None if timeout. The dict will contain "timestamp" in seconds,
+                           "iteration", "step", "voltage" at the end of the current step and "discharge" in coulombs accumulating
+                           the total discharge of the battery since profiling start.
+
+        """
+        response_data = await self._call("arc_wait_for_battery_data", {"timeout": timeout}, timeout=60 + (timeout / 1000))
+        return response_data["value"]
+
+    async def write_tx(self, value):
+        """ Write data to TX.
+
+        Args:
+            value (str): Data to write to TX.
+
+        """
+        await self._call("arc_write_tx", {"value": value})
+
+    async def get_property(self, name):
+        # pylint: disable=missing-function-docstring
+        response_data = await self._call("arc_get_property", {"name": name})
+        return response_data.get("value", None)
+
+    async def set_property(self, name, value):
+        # pylint: disable=missing-function-docstring
+        await self._call("arc_set_property", {"name": name, "value": value})
+
+    async def commit(self):
+        # pylint: disable=missing-function-docstring
+        await self._call("arc_commit")
+
+    async def firmware_upgrade(self, filename = None):
+        """ Initiate device firmware update.
+
+        Args:
+            filename (str, optional): Firmware filename.
+
+        """
+        await self._call("arc_firmware_upgrade", {"filename": filename})
+
+async def add_all_to_project(arcs):
+    """ Add several devices to the current project concurrently.
+
+    Args:
+        arcs (list): AsyncArc objects to add.
+
+    """
+    await asyncio.gather(*(device.add_to_project() for device in arcs))
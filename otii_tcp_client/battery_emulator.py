@@ -1,6 +1,15 @@
 #!/usr/bin/env python3
 # pylint: disable=missing-module-docstring
-from otii_tcp_client import otii_exception
+from otii_tcp_client import framing, otii_connection
+
+# Values returned by get_state, mapped to the getter command and the key of the value in its response
+STATE_COMMANDS = {
+    "parallel": ("battery_emulator_get_parallel", "value"),
+    "series": ("battery_emulator_get_series", "value"),
+    "soc": ("battery_emulator_get_soc", "value"),
+    "soc_tracking": ("battery_emulator_get_soc_tracking", "enabled"),
+    "used_capacity": ("battery_emulator_get_used_capacity", "value"),
+}
 
 class BatteryEmulator:
     """ Class to define a Battery Emulator object.
@@ -10,6 +19,8 @@ class BatteryEmulator:
         connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
 
     """
+    __slots__ = ("id", "connection", "_id_data", "_encoded_requests")
+
     def __init__(self, battery_emulator_id, connection):
         """
         Args:
@@ -19,6 +30,43 @@ class BatteryEmulator:
         """
         self.id = battery_emulator_id
         self.connection = connection
+        self._id_data = {"battery_emulator_id": self.id}
+        # The getters only send the id, encode their requests up front for polling loops
+        self._encoded_requests = {
+            cmd: framing.dumps({"type": "request", "cmd": cmd, "data": self._id_data})
+            for cmd, _ in STATE_COMMANDS.values()
+        }
+
+    def _call(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        # The request without arguments only depends on the battery emulator id, encode it once per command.
+        # Only the arguments are then encoded for each call.
+        encoded_request = self._encoded_requests.get(cmd)
+        if encoded_request is None:
+            encoded_request = framing.dumps({"type": "request", "cmd": cmd, "data": self._id_data})
+            self._encoded_requests[cmd] = encoded_request
+        if data:
+            encoded_request = framing.add_data(encoded_request, data)
+        response = self.connection.send_encoded_and_receive(encoded_request)
+        return otii_connection.response_data(response)
+
+    def _send(self, cmd, data, wait=True):
+        # pylint: disable=missing-function-docstring
+        if self.connection.pipelining:
+            self.connection.queue({"type": "request", "cmd": cmd, "data": {**self._id_data, **data}})
+        elif not wait or self.connection.bursting:
+            self.connection.send_nowait({"type": "request", "cmd": cmd, "data": {**self._id_data, **data}})
+        else:
+            self._call(cmd, data)
+
+    def flush(self):
+        """ Wait for the responses of commands sent with wait = False.
+
+        Raises:
+            Otii_Exception: If one of the commands failed.
+
+        """
+        self.connection.flush()
 
     def get_parallel(self):
         """ Get current number of emulated batteries in parallel.
@@ -27,12 +75,7 @@ class BatteryEmulator:
             int: Number of batteries in parallel.
 
         """
-        data = {"battery_emulator_id": self.id}
-        request = {"type": "request", "cmd": "battery_emulator_get_parallel", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("battery_emulator_get_parallel")["value"]
 
     def get_series(self):
         """ Get current number of simulated batteries in series.
@@ -41,12 +84,7 @@ class BatteryEmulator:
             int: Number of batteries in series.
 
         """
-        data = {"battery_emulator_id": self.id}
-        request = {"type": "request", "cmd": "battery_emulator_get_series", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("battery_emulator_get_series")["value"]
 
     def get_soc(self):
         """ Get State of Charge.
@@ -55,16 +93,7 @@ class BatteryEmulator:
             float: State of charge in percent.
 
         """
-        data = {"battery_emulator_id": self.id}
-        request = {
-            "type": "request",
-            "cmd": "battery_emulator_get_soc",
-            "data": data
-        }
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
+        return self._call("battery_emulator_get_soc")["value"]
 
     def get_soc_tracking(self):
         """ Get current state of battery emulator State of Charge tracking.
@@ -73,12 +102,22 @@ class BatteryEmulator:
             bool: True if State fo Charge tracking is enabled, False if disabled.
 
         """
-        data = {"battery_emulator_id": self.id}
-        request = {"type": "request", "cmd": "battery_emulator_get_soc_tracking", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["enabled"]
+        return self._call("battery_emulator_get_soc_tracking")["enabled"]
+
+    def get_state(self):
+        """ Get the state of the battery emulator in one round trip.
+
+        Returns:
+            dict: Dictionary with keys parallel (int), series (int), soc (float), soc_tracking (bool)
+            and used_capacity (float), with the same values as returned by the corresponding getters.
+
+        """
+        encoded_requests = [self._encoded_requests[cmd] for cmd, _ in STATE_COMMANDS.values()]
+        responses = self.connection.send_encoded_and_receive_many(encoded_requests)
+        return {
+            name: otii_connection.response_data(response)[key]
+            for (name, (_, key)), response in zip(STATE_COMMANDS.items(), responses)
+        }
 
     def get_used_capacity(self):
         """ Get current battery emulator used capacity.
@@ -87,77 +126,46 @@ class BatteryEmulator:
             float: Used capacity in coulomb (C).
 
         """
-        data = {"battery_emulator_id": self.id}
-        request = {"type": "request", "cmd": "battery_emulator_get_used_capacity", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["value"]
-
-    def set_soc(self, value):
+        return self._call("battery_emulator_get_used_capacity")["value"]
+
+    def set_soc(self, value, wait = True):
         """ Set State of Charge.
 
         Args:
             value (float): State of charge in percent
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {
-            "battery_emulator_id": self.id,
-            "value": value
-        }
-        request = {
-            "type": "request",
-            "cmd": "battery_emulator_set_soc",
-            "data": data
-        }
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("battery_emulator_set_soc", {"value": value}, wait)
 
-    def set_soc_tracking(self, enable):
+    def set_soc_tracking(self, enable, wait = True):
         """ Set State of Charge tracking.
 
         Args:
             enable (bool): True to enable State of Charge tracking, False to disable.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"battery_emulator_id": self.id, "enable": enable}
-        request = {"type": "request", "cmd": "battery_emulator_set_soc_tracking", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("battery_emulator_set_soc_tracking", {"enable": enable}, wait)
 
-    def set_used_capacity(self, value):
+    def set_used_capacity(self, value, wait = True):
         """ Set used capacity.
 
         Args:
             value (float): Capacity used in coulombs (C), multiply mAh by 3.6 to get C.
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {"battery_emulator_id": self.id, "value": value}
-        request = {"type": "request", "cmd": "battery_emulator_set_used_capacity", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("battery_emulator_set_used_capacity", {"value": value}, wait)
 
-    def update_profile(self, battery_profile_id, mode):
+    def update_profile(self, battery_profile_id, mode, wait = True):
         """ Update battery profile.
 
         Args:
             battery_profile_id (string): Id of battery profile, as returned by otii.get_battery_profiles.
             mode (string): "keep_soc" or "reset"
+            wait (bool, optional): False to return without waiting for the response, default True.
 
         """
-        data = {
-            "battery_emulator_id": self.id,
-            "battery_profile_id": battery_profile_id,
-            "mode": mode
-        }
-        request = {
-            "type": "request",
-            "cmd": "battery_emulator_update_profile",
-            "data": data,
-        }
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        data = {"battery_profile_id": battery_profile_id, "mode": mode}
+        self._send("battery_emulator_update_profile", data, wait)
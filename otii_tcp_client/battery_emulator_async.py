@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# pylint: disable=missing-module-docstring
+import asyncio
+from otii_tcp_client import battery_emulator, framing, otii_connection
+
+class AsyncBatteryEmulator:
+    """ Class to define a Battery Emulator object controlled using asyncio.
+        Includes the same operations as :obj:BatteryEmulator, as coroutines.
+
+    Attributes:
+        id (string): Id of the battery emulator.
+        connection (:obj:AsyncOtiiConnection): Object to handle connection to the Otii server.
+
+    """
+    __slots__ = ("id", "connection", "_id_data", "_encoded_requests")
+
+    def __init__(self, battery_emulator_id, connection):
+        """
+        Args:
+            battery_emulator_id (string): Id of the battery emulator.
+            connection (:obj:AsyncOtiiConnection): Object to handle connection to the Otii server.
+
+        """
+        self.id = battery_emulator_id
+        self.connection = connection
+        self._id_data = {"battery_emulator_id": self.id}
+        self._encoded_requests = {}
+
+    async def _call(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        # Requests are encoded once per command, and only the arguments are encoded for each call
+        encoded_request = self._encoded_requests.get(cmd)
+        if encoded_request is None:
+            encoded_request = framing.dumps({"type": "request", "cmd": cmd, "data": self._id_data})
+            self._encoded_requests[cmd] = encoded_request
+        if data:
+            encoded_request = framing.add_data(encoded_request, data)
+        response = await self.connection.send_encoded_and_receive(encoded_request)
+        return otii_connection.response_data(response)
+
+    async def get_parallel(self):
+        """ Get current number of emulated batteries in parallel.
+
+        Returns:
+            int: Number of batteries in parallel.
+
+        """
+        return (await self._call("battery_emulator_get_parallel"))["value"]
+
+    async def get_series(self):
+        """ Get current number of simulated batteries in series.
+
+        Returns:
+            int: Number of batteries in series.
+
+        """
+        return (await self._call("battery_emulator_get_series"))["value"]
+
+    async def get_soc(self):
+        """ Get State of Charge.
+
+        Returns:
+            float: State of charge in percent.
+
+        """
+        return (await self._call("battery_emulator_get_soc"))["value"]
+
+    async def get_soc_tracking(self):
+        """ Get current state of battery emulator State of Charge tracking.
+
+        Returns:
+            bool: True if State fo Charge tracking is enabled, False if disabled.
+
+        """
+        return (await self._call("battery_emulator_get_soc_tracking"))["enabled"]
+
+    async def get_state(self):
+        """ Get the state of the battery emulator, with the getters sent concurrently.
+
+        Returns:
+            dict: Dictionary with keys parallel (int), series (int), soc (float), soc_tracking (bool)
+            and used_capacity (float), with the same values as returned by the corresponding getters.
+
+        """
+        commands = battery_emulator.STATE_COMMANDS
+        responses = await asyncio.gather(*(self._call(cmd) for cmd, _ in commands.values()))
+        return {
+            name: response_data[key]
+            for (name, (_, key)), response_data in zip(commands.items(), responses)
+        }
+
+    async def get_used_capacity(self):
+        """ Get current battery emulator used capacity.
+
+        Returns:
+            float: Used capacity in coulomb (C).
+
+        """
+        return (await self._call("battery_emulator_get_used_capacity"))["value"]
+
+    async def set_soc(self, value):
+        """ Set State of Charge.
+
+        Args:
+            value (float): State of charge in percent
+
+        """
+        await self._call("battery_emulator_set_soc", {"value": value})
+
+    async def set_soc_tracking(self, enable):
+        """ Set State of Charge tracking.
+
+        Args:
+            enable (bool): True to enable State of Charge tracking, False to disable.
+
+        """
+        await self._call("battery_emulator_set_soc_tracking", {"enable": enable})
+
+    async def set_used_capacity(self, value):
+        """ Set used capacity.
+
+        Args:
+            value (float): Capacity used in coulombs (C), multiply mAh by 3.6 to get C.
+
+        """
+        await self._call("battery_emulator_set_used_capacity", {"value": value})
+
+    async def update_profile(self, battery_profile_id, mode):
+        """ Update battery profile.
+
+        Args:
+            battery_profile_id (string): Id of battery profile, as returned by otii.get_battery_profiles.
+            mode (string): "keep_soc" or "reset"
+
+        """
+        await self._call("battery_emulator_update_profile", {"battery_profile_id": battery_profile_id, "mode": mode})
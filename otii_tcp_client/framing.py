@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# pylint: disable=missing-module-docstring
+import json
+from typing import Any, Callable
+
+# One shared encoder, without whitespace after separators to keep requests small
+encode_json = json.JSONEncoder(separators=(",", ":")).encode
+
+def _dumps(obj):
+    # pylint: disable=missing-function-docstring
+    return encode_json(obj).encode("utf-8")
+
+def _decode_buffer(buffer):
+    # pylint: disable=missing-function-docstring
+    return json.loads(bytes(buffer))
+
+# The standard library is used unless a faster JSON library is installed. The
+# types are declared here, as the functions are replaced depending on what is installed.
+dumps: Callable[[Any], bytes] = _dumps
+decode_json: Callable[[Any], Any] = json.loads
+decode_buffer: Callable[[Any], Any] = _decode_buffer
+
+try:
+    # orjson encodes and decodes JSON in Rust, and is used when installed
+    import orjson
+    dumps = orjson.dumps
+    decode_json = orjson.loads
+    # orjson decodes directly from a memoryview of the receive buffer
+    decode_buffer = decode_json
+except ImportError:
+    try:
+        # msgspec decodes JSON in C, and is used when installed
+        import msgspec
+        decode_json = msgspec.json.decode
+        decode_buffer = decode_json
+    except ImportError:
+        pass
+
+DELIMITER = b"\r\n"
+# JSON escapes line feeds in strings, so a line feed in the stream always ends
+# a message. A single byte is searched for with memchr, much faster than the
+# full delimiter. The carriage return left before it is whitespace to JSON.
+LINE_FEED = ord("\n")
+
+def encode_request(request, trans_id):
+    """ Encode a request as one line of JSON.
+
+    Args:
+        request (dict): Server request, the trans_id is added to it.
+        trans_id (str): ID of transmission.
+
+    Returns:
+        bytes: Encoded request, including line ending.
+
+    """
+    request["trans_id"] = trans_id
+    return dumps(request) + DELIMITER
+
+def add_trans_id(encoded_request, trans_id):
+    """ Add a trans_id to an already encoded request.
+
+    Args:
+        encoded_request (bytes): JSON encoded server request, without trans_id and line ending.
+        trans_id (str): ID of transmission.
+
+    Returns:
+        bytes: Encoded request, including line ending.
+
+    """
+    return encoded_request[:-1] + b',"trans_id":"' + trans_id.encode("utf-8") + b'"}' + DELIMITER
+
+def add_data(encoded_request, data):
+    """ Add keys to the data of an already encoded request.
+
+    Only the added keys are encoded, the rest of the request is reused as is.
+
+    Args:
+        encoded_request (bytes): JSON encoded server request, ending with its non-empty data object.
+        data (dict): Keys to add to the data, must not be empty.
+
+    Returns:
+        bytes: Encoded request, without trans_id and line ending.
+
+    """
+    return encoded_request[:-2] + b"," + dumps(data)[1:] + b"}"
+
+def _decode_lines(buffer, view, start, end, scan=0):
+    # pylint: disable=missing-function-docstring
+    messages = []
+    position = buffer.find(LINE_FEED, max(start, scan), end)
+    while position != -1:
+        messages.append(decode_buffer(view[start:position]))
+        start = position + 1
+        position = buffer.find(LINE_FEED, start, end)
+    return messages, start
+
+class LineDecoder:
+    """ Class to split received data into decoded JSON messages
+
+    Data is received into a preallocated buffer, and each message is decoded
+    from a memoryview of the buffer. The buffer is grown if a message does
+    not fit. Data is split on line endings before it is decoded as UTF-8, so a
+    multi-byte character split between two reads is decoded correctly.
+    A large message received in many reads is only searched once, each read
+    continues the search where the previous one stopped.
+
+    """
+    def __init__(self, size=128 * 1024):
+        """
+        Args:
+            size (int, optional): Initial size of the receive buffer, default 128 kB.
+
+        """
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        # Bytes before this offset are known not to contain a line feed
+        self._scan = 0
+
+    def _reserve(self, size):
+        # pylint: disable=missing-function-docstring
+        if self._end + size <= len(self._buffer):
+            return
+        # Move the partially received message to the start of the buffer
+        length = self._end - self._start
+        if length + size > len(self._buffer):
+            # Copied straight from the old buffer into the new one
+            buffer = bytearray(max(2 * len(self._buffer), length + size))
+            buffer[:length] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        else:
+            self._buffer[:length] = bytes(self._view[self._start:self._end])
+        self._scan -= self._start
+        self._start = 0
+        self._end = length
+
+    def recv_into(self, sock, size=4096):
+        """ Receive data from a socket directly into the buffer.
+
+        Args:
+            sock (socket): Socket to receive from.
+            size (int, optional): Minimum free space in the buffer, default 4 kB.
+
+        Returns:
+            int: Number of bytes received, 0 if the connection was closed.
+
+        """
+        self._reserve(size)
+        received = sock.recv_into(self._view[self._end:])
+        self._end += received
+        return received
+
+    def messages(self):
+        """ Decode all messages completely received.
+
+        Returns:
+            list: Decoded JSON messages.
+
+        """
+        messages, self._start = _decode_lines(self._buffer, self._view, self._start, self._end, self._scan)
+        if self._start == self._end:
+            self._start = self._end = 0
+        self._scan = self._end
+        return messages
+
+    def feed(self, data):
+        """ Add received data.
+
+        Args:
+            data (bytes): Data received from the server.
+
+        Returns:
+            list: Decoded JSON messages completed by the data.
+
+        """
+        if self._start == self._end and data.endswith(DELIMITER):
+            # Nothing is pending, and the data ends with a complete message, so
+            # the messages are decoded from the data without copying it
+            return _decode_lines(data, memoryview(data), 0, len(data))[0]
+        self._reserve(len(data))
+        self._buffer[self._end:self._end + len(data)] = data
+        self._end += len(data)
+        return self.messages()
+
+    def reset(self):
+        """ Drop any partially received message.
+
+        """
+        self._start = self._end = self._scan = 0
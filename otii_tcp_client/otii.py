@@ -1,6 +1,83 @@
 #!/usr/bin/env python3
 # pylint: disable=missing-module-docstring
-from otii_tcp_client import otii_connection, otii_exception, project, arc
+import time
+from typing import NamedTuple
+from otii_tcp_client import framing, otii_connection, project, arc
+
+# Class used for each device type returned by default from get_devices
+DEVICE_CLASSES = {"Arc": arc.Arc, "Ace": arc.Arc, "Simulator": arc.Arc}
+
+# Requests without data, encoded the first time they are sent
+_encoded_requests = {}
+
+def encoded_request(cmd):
+    """ Get a request without data, JSON encoded.
+
+    Args:
+        cmd (str): Command of the request.
+
+    Returns:
+        bytes: Encoded request, without trans_id and line ending.
+
+    """
+    encoded = _encoded_requests.get(cmd)
+    if encoded is None:
+        encoded = _encoded_requests[cmd] = framing.dumps({"type": "request", "cmd": cmd})
+    return encoded
+
+def wrap_devices(device_dicts, classes, connection, known):
+    """ Create device objects, reusing the objects of devices that were returned before.
+
+    Reused objects forget their cached values, as the device may have been reconnected.
+
+    Args:
+        device_dicts (list): Devices returned by the server.
+        classes (dict): Class to use for each device type, other devices are left out.
+        connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
+        known (dict): Device objects returned before, by device id.
+
+    Returns:
+        tuple: List of device objects, and the device objects by device id.
+
+    """
+    devices = []
+    by_id = {}
+    for device in device_dicts:
+        device_class = classes.get(device["type"])
+        if device_class is None:
+            continue
+        wrapper = known.get(device["device_id"])
+        if wrapper is None or not isinstance(wrapper, device_class) or wrapper.name != device["name"]:
+            wrapper = device_class(device, connection)
+        else:
+            wrapper.cache_clear()
+        devices.append(wrapper)
+        by_id[wrapper.id] = wrapper
+    return devices, by_id
+
+class License(NamedTuple):
+    """ License of the logged in user, returned by get_licenses with as_tuples = True
+
+    """
+    id: int
+    type: str
+    available: bool
+    reserved_to: str
+    hostname: str
+    addons: list
+
+    @classmethod
+    def from_data(cls, data):
+        # pylint: disable=missing-function-docstring
+        return cls(
+            data["id"],
+            data["type"],
+            data["available"],
+            data["reserved_to"],
+            # Not sent by all server versions
+            data.get("hostname", ""),
+            data.get("addons", []),
+        )
 
 class Otii:
     """ Class to define an Otii object.
@@ -9,13 +86,49 @@ class Otii:
         connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
 
     """
-    def __init__(self, connection=None):
+    __slots__ = ("connection", "_cache", "_cache_enabled", "_cache_ttl", "_devices")
+
+    def __init__(self, connection=None, *, cache=True, cache_ttl=None):
         """
         Args:
             connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
+            cache (bool, optional): True to cache device ids and battery profiles, that do not
+            change during a session, default True.
+            cache_ttl (float, optional): Seconds until a cached value is asked for again, e.g. when
+            devices are replaced while connected, default None to keep it until invalidate_cache is called.
 
         """
         self.connection = connection
+        self._cache = {}
+        self._cache_enabled = cache
+        self._cache_ttl = cache_ttl
+        self._devices = {}
+
+    def _call(self, cmd, data=None, timeout=3):
+        # pylint: disable=missing-function-docstring
+        if data is None:
+            response = self.connection.send_encoded_and_receive(encoded_request(cmd), timeout)
+            return otii_connection.response_data(response)
+        return self.connection.request(cmd, data, timeout)
+
+    def _send(self, cmd, data):
+        # pylint: disable=missing-function-docstring
+        if self.connection.pipelining:
+            self.connection.queue({"type": "request", "cmd": cmd, "data": data})
+        else:
+            self._call(cmd, data)
+
+    def _cached_call(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        if not self._cache_enabled:
+            return self._call(cmd, data)
+        cached = self._cache.setdefault(cmd, {})
+        key = None if data is None else tuple(data.values())
+        entry = cached.get(key)
+        if entry is None or (entry[0] is not None and time.monotonic() >= entry[0]):
+            expires = None if self._cache_ttl is None else time.monotonic() + self._cache_ttl
+            entry = cached[key] = (expires, self._call(cmd, data))
+        return entry[1]
 
     def create_project(self):
         """ Create a new project.
@@ -24,11 +137,38 @@ class Otii:
             int: ID of created project.
 
         """
-        request = {"type": "request", "cmd": "otii_create_project"}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return project.Project(response["data"]["project_id"], self.connection)
+        response_data = self._call("otii_create_project")
+        return project.Project(response_data["project_id"], self.connection)
+
+    def gather(self, commands, timeout = 3):
+        """ Send several commands in one round trip.
+
+        .. code-block:: python
+
+            licenses, profiles = otii.gather([
+                ("otii_get_licenses", None),
+                ("otii_get_battery_profiles", None),
+            ])
+
+        Args:
+            commands (list): List of (command, data) tuples, data is None for commands without data.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            list: Data of the server responses, in the same order as the commands.
+
+        Raises:
+            Otii_Exception: If the server returned an error for any of the commands.
+
+        """
+        requests = []
+        for cmd, data in commands:
+            request = {"type": "request", "cmd": cmd}
+            if data is not None:
+                request["data"] = data
+            requests.append(request)
+        responses = self.connection.send_and_receive_many(requests, timeout)
+        return [otii_connection.response_data(response) for response in responses]
 
     def get_active_project(self):
         """ Returns the active project if there is one.
@@ -37,13 +177,10 @@ class Otii:
             :obj:Project: Project object.
 
         """
-        request = {"type": "request", "cmd": "otii_get_active_project"}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        if response["data"]["project_id"] == -1:
+        response_data = self._call("otii_get_active_project")
+        if response_data["project_id"] == -1:
             return None
-        return project.Project(response["data"]["project_id"], self.connection)
+        return project.Project(response_data["project_id"], self.connection)
 
     def get_battery_profile_info(self, battery_profile_id):
         """ Returns informatiion about a battery profile.
@@ -52,11 +189,7 @@ class Otii:
             battery_profile_id (string): Battery profile id.
         """
         data = {"battery_profile_id": battery_profile_id}
-        request = {"type": "request", "cmd": "otii_get_battery_profile_info", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]
+        return dict(self._cached_call("otii_get_battery_profile_info", data))
 
     def get_battery_profiles(self):
         """ Returns a list of available battery profiles.
@@ -65,11 +198,7 @@ class Otii:
             list: List of battery profile objects
 
         """
-        request = {"type": "request", "cmd": "otii_get_battery_profiles"}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["battery_profiles"]
+        return list(self._cached_call("otii_get_battery_profiles")["battery_profiles"])
 
     def get_device_id(self, device_name):
         """ Get device id from device name.
@@ -82,11 +211,7 @@ class Otii:
 
         """
         data = {"device_name": device_name}
-        request = {"type": "request", "cmd": "otii_get_device_id", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["device_id"]
+        return self._cached_call("otii_get_device_id", data)["device_id"]
 
     def get_devices(self, timeout = 10, devicefilter = None):
         """ Get a list of connected devices.
@@ -96,29 +221,32 @@ class Otii:
             devicefilter (tuple, optional): Override default device filter
 
         Returns:
-            list: List of Arc device objects.
+            list: List of Arc device objects. A device returned by an earlier call
+            is returned as the same object.
 
         """
         data = {"timeout": timeout}
-        request = {"type": "request", "cmd": "otii_get_devices", "data": data}
-        response = self.connection.send_and_receive(request, timeout + 3)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        if not response["data"]:
+        response_data = self._call("otii_get_devices", data, timeout + 3)
+        # The devices have been enumerated again, device ids are looked up again when needed
+        self._cache.pop("otii_get_device_id", None)
+        if not response_data:
             return []
-        device_objects = []
-        for device in response["data"]["devices"]:
-            devfilter = ("Arc", "Ace", "Simulator") if devicefilter is None else devicefilter
-            if device["type"] in devfilter:
-                device_object = arc.Arc(device, self.connection)
-                device_objects.append(device_object)
-        return device_objects
-
-    def get_licenses(self):
+        if devicefilter is None:
+            classes = DEVICE_CLASSES
+        else:
+            classes = {device_type: DEVICE_CLASSES.get(device_type, arc.Arc) for device_type in devicefilter}
+        devices, self._devices = wrap_devices(response_data["devices"], classes, self.connection, self._devices)
+        return devices
+
+    def get_licenses(self, as_tuples = False):
         """ Return a list of all licenses for logged in user
 
+        Args:
+            as_tuples (bool, optional): True to return the licenses as :obj:License named tuples,
+            instead of the dicts received from the server.
+
         Returns:
-            list: List of licenses
+            list: List of license dicts, or :obj:License if as_tuples is True
 
             .. code-block:: json
 
@@ -135,11 +263,16 @@ class Otii:
                 }]
 
         """
-        request = {"type": "request", "cmd": "otii_get_licenses"}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["licenses"]
+        licenses = self._call("otii_get_licenses")["licenses"]
+        if not as_tuples:
+            return licenses
+        return [License.from_data(lic) for lic in licenses]
+
+    def invalidate_cache(self):
+        """ Forget cached device ids and battery profiles, e.g. when a device has been replaced.
+
+        """
+        self._cache.clear()
 
     def login(self, username, password):
         """ Login user
@@ -149,18 +282,12 @@ class Otii:
                 password: Password of Otii user
         """
         data = {"username": username, "password": password}
-        request = {"type": "request", "cmd": "otii_login", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._call("otii_login", data)
 
     def logout(self):
         """ Logout user
         """
-        request = {"type": "request", "cmd": "otii_logout"}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._call("otii_logout")
 
     def open_project(self, filename, force = False, progress = False):
         """ Open an existing project.
@@ -176,16 +303,36 @@ class Otii:
 
         """
         data = {"filename": filename, "force": force, "progress": progress}
-        request = {"type": "request", "cmd": "otii_open_project", "data": data}
         # Set timeout to None (blocking) as command can operate
         # over large quantities of data to avoid timeout
-        response = self.connection.send_and_receive(request, None)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        proj = project.Project(response["data"]["project_id"], self.connection)
-        proj.filename = response["data"]["filename"]
+        response_data = self._call("otii_open_project", data, None)
+        proj = project.Project(response_data["project_id"], self.connection)
+        proj.filename = response_data["filename"]
         return proj
 
+    def pipeline(self):
+        """ Context manager that sends commands together, instead of one at a time.
+
+        Commands that do not return a value, e.g. set_all_main and reserve_license, are held
+        back inside the context, and sent all at once when leaving it. A command that returns
+        a value sends the held back commands together with itself. Commands to devices sharing
+        the connection are held back too. Errors for held back commands are raised when they are sent.
+        Only available when the Otii object uses an :obj:OtiiConnection.
+
+        .. code-block:: python
+
+            with otii.pipeline():
+                otii.set_all_main(False)
+                for device in devices:
+                    device.set_main_voltage(3.3)
+                otii.set_all_main(True)
+
+        Returns:
+            Context manager for the pipeline.
+
+        """
+        return self.connection.pipeline()
+
     def reserve_license(self, license_id):
         """ Reserve license
 
@@ -193,10 +340,7 @@ class Otii:
             license_id (int): The license id to reserve.
         """
         data = {"license_id": license_id}
-        request = {"type": "request", "cmd": "otii_reserve_license", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("otii_reserve_license", data)
 
     def return_license(self, license_id):
         """ Return license
@@ -205,10 +349,7 @@ class Otii:
             license_id (int): The license id to return.
         """
         data = {"license_id": license_id}
-        request = {"type": "request", "cmd": "otii_return_license", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("otii_return_license", data)
 
     def set_all_main(self, enable):
         """ Turn on or off the main power on all connected devices.
@@ -218,19 +359,13 @@ class Otii:
 
         """
         data = {"enable": enable}
-        request = {"type": "request", "cmd": "otii_set_all_main", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self._send("otii_set_all_main", data)
 
     def shutdown(self):
         """ Shutdown Otii
 
         """
-        request = {"type": "request", "cmd": "otii_shutdown"}
         try:
-            response = self.connection.send_and_receive(request)
-            if response["type"] == "error":
-                raise otii_exception.Otii_Exception(response)
+            self._call("otii_shutdown")
         except otii_connection.DisconnectedException:
             pass
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# pylint: disable=missing-module-docstring
+import time
+from otii_tcp_client import arc_async, otii, otii_client, otii_connection, otii_connection_async, otii_exception
+
+# Class used for each device type returned by default from get_devices
+DEVICE_CLASSES = {"Arc": arc_async.AsyncArc, "Ace": arc_async.AsyncArc, "Simulator": arc_async.AsyncArc}
+
+class AsyncOtii:
+    """ Class to define an Otii object controlled using asyncio.
+        Includes the same operations as :obj:Otii, as coroutines.
+
+        Devices are returned as :obj:AsyncArc objects. Projects are returned as
+        project ids, as there is no asyncio variant of :obj:Project.
+
+    Attributes:
+        connection (:obj:AsyncOtiiConnection): Object to handle connection to the Otii server.
+
+    """
+    __slots__ = ("connection", "_cache", "_cache_enabled", "_cache_ttl", "_devices")
+
+    def __init__(self, connection, *, cache=True, cache_ttl=None):
+        """
+        Args:
+            connection (:obj:AsyncOtiiConnection): Object to handle connection to the Otii server.
+            cache (bool, optional): True to cache device ids and battery profiles, default True.
+            cache_ttl (float, optional): Seconds until a cached value is asked for again,
+            default None to keep it until invalidate_cache is called.
+
+        """
+        self.connection = connection
+        self._cache = {}
+        self._cache_enabled = cache
+        self._cache_ttl = cache_ttl
+        self._devices = {}
+
+    async def _call(self, cmd, data=None, timeout=3):
+        # pylint: disable=missing-function-docstring
+        if data is None:
+            response = await self.connection.send_encoded_and_receive(otii.encoded_request(cmd), timeout)
+            return otii_connection.response_data(response)
+        return await self.connection.request(cmd, data, timeout)
+
+    async def _cached_call(self, cmd, data=None):
+        # pylint: disable=missing-function-docstring
+        if not self._cache_enabled:
+            return await self._call(cmd, data)
+        cached = self._cache.setdefault(cmd, {})
+        key = None if data is None else tuple(data.values())
+        entry = cached.get(key)
+        if entry is None or (entry[0] is not None and time.monotonic() >= entry[0]):
+            expires = None if self._cache_ttl is None else time.monotonic() + self._cache_ttl
+            entry = cached[key] = (expires, await self._call(cmd, data))
+        return entry[1]
+
+    async def create_project(self):
+        """ Create a new project.
+
+        Returns:
+            int: ID of created project.
+
+        """
+        return (await self._call("otii_create_project"))["project_id"]
+
+    async def get_active_project(self):
+        """ Returns the id of the active project if there is one.
+
+        Returns:
+            int: ID of the active project, None if there is no active project.
+
+        """
+        project_id = (await self._call("otii_get_active_project"))["project_id"]
+        return None if project_id == -1 else project_id
+
+    async def get_battery_profile_info(self, battery_profile_id):
+        """ Returns informatiion about a battery profile.
+
+        Args:
+            battery_profile_id (string): Battery profile id.
+        """
+        return dict(await self._cached_call("otii_get_battery_profile_info", {"battery_profile_id": battery_profile_id}))
+
+    async def get_battery_profiles(self):
+        """ Returns a list of available battery profiles.
+
+        Returns:
+            list: List of battery profile objects
+
+        """
+        return list((await self._cached_call("otii_get_battery_profiles"))["battery_profiles"])
+
+    async def get_device_id(self, device_name):
+        """ Get device id from device name.
+
+        Args:
+            device_name (str): Name of device to get ID of.
+
+        Returns:
+            str: Device ID of requested device.
+
+        """
+        return (await self._cached_call("otii_get_device_id", {"device_name": device_name}))["device_id"]
+
+    async def get_devices(self, timeout = 10, devicefilter = None):
+        """ Get a list of connected devices.
+
+        Args:
+            timeout (int, optional): Timeout in seconds to wait for avaliable devices.
+            devicefilter (tuple, optional): Override default device filter
+
+        Returns:
+            list: List of AsyncArc device objects. A device returned by an earlier call
+            is returned as the same object.
+
+        """
+        response_data = await self._call("otii_get_devices", {"timeout": timeout}, timeout + 3)
+        self._cache.pop("otii_get_device_id", None)
+        if not response_data:
+            return []
+        if devicefilter is None:
+            classes = DEVICE_CLASSES
+        else:
+            classes = {device_type: DEVICE_CLASSES.get(device_type, arc_async.AsyncArc) for device_type in devicefilter}
+        devices, self._devices = otii.wrap_devices(
+            response_data["devices"], classes, self.connection, self._devices)
+        return devices
+
+    async def get_licenses(self, as_tuples = False):
+        """ Return a list of all licenses for logged in user
+
+        Args:
+            as_tuples (bool, optional): True to return the licenses as :obj:License named tuples,
+            instead of the dicts received from the server.
+
+        Returns:
+            list: List of license dicts, or :obj:License if as_tuples is True, see :obj:Otii.get_licenses.
+
+        """
+        licenses = (await self._call("otii_get_licenses"))["licenses"]
+        if not as_tuples:
+            return licenses
+        return [otii.License.from_data(lic) for lic in licenses]
+
+    def invalidate_cache(self):
+        """ Forget cached device ids and battery profiles, e.g. when a device has been replaced.
+
+        """
+        self._cache.clear()
+
+    async def login(self, username, password):
+        """ Login user
+
+            Args:
+                username: Name of Otii user
+                password: Password of Otii user
+        """
+        await self._call("otii_login", {"username": username, "password": password})
+
+    async def logout(self):
+        """ Logout user
+        """
+        await self._call("otii_logout")
+
+    async def open_project(self, filename, force = False, progress = False):
+        """ Open an existing project.
+
+        Args:
+            filename (str): Name of project file.
+            force (bool, optional): True to open even if unsaved data exists, False not to.
+            progress (bool, optional): True to receive notifications about progress of opening file,
+            False not to. Subscribe to the connection to receive them.
+
+        Returns:
+            int: ID of opened project.
+
+        """
+        data = {"filename": filename, "force": force, "progress": progress}
+        # Set timeout to None (blocking) as command can operate
+        # over large quantities of data to avoid timeout
+        return (await self._call("otii_open_project", data, None))["project_id"]
+
+    async def reserve_license(self, license_id):
+        """ Reserve license
+
+        Args:
+            license_id (int): The license id to reserve.
+        """
+        await self._call("otii_reserve_license", {"license_id": license_id})
+
+    async def return_license(self, license_id):
+        """ Return license
+
+        Args:
+            license_id (int): The license id to return.
+        """
+        await self._call("otii_return_license", {"license_id": license_id})
+
+    async def set_all_main(self, enable):
+        """ Turn on or off the main power on all connected devices.
+
+        Args:
+            enable (bool): True to turn on main power, False to turn off.
+
+        """
+        await self._call("otii_set_all_main", {"enable": enable})
+
+    async def shutdown(self):
+        """ Shutdown Otii
+
+        """
+        try:
+            await self._call("otii_shutdown")
+        except otii_connection.DisconnectedException:
+            pass
+
+async def connect(host = otii_client.DEFAULT_HOST,
+                  port = otii_client.DEFAULT_PORT,
+                  try_for_seconds = otii_client.DEFAULT_CONNECTION_TIMEOUT):
+    """ Connect to Otii using asyncio.
+
+    Licenses are not reserved automatically, use reserve_license if needed.
+
+    Args:
+        host (str, optional): Server address.
+        port (int, optional): Connection port number.
+        try_for_seconds (int, optional): Seconds to try to connect.
+
+    Returns:
+        :obj:AsyncOtii: Otii object using the new connection. Close it with
+        connection.close_connection when done.
+
+    Raises:
+        Otii_Exception: If the server refused the connection.
+
+    """
+    connection = otii_connection_async.AsyncOtiiConnection(host, port)
+    connect_response = await connection.connect_to_server(try_for_seconds = try_for_seconds)
+    try:
+        otii_connection.response_data(connect_response)
+    except otii_exception.Otii_Exception:
+        await connection.close_connection()
+        raise
+    return AsyncOtii(connection)
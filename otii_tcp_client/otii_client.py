@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # pylint: disable=missing-module-docstring
+import functools
 import json
 import os
+import random
+import time
 from enum import Enum
 from otii_tcp_client import otii, otii_connection, otii_exception
 
@@ -16,6 +19,9 @@ DEFAULT_CONNECTION_TIMEOUT = 10
 DEFAULT_LICENSING_MODE = LicensingMode.AUTO
 DEFAULT_CREDENTIALS = './credentials.json'
 DEFAULT_LICENSES = None
+LICENSE_RESERVE_ATTEMPTS = 4
+LICENSE_RETRY_DELAY = 0.25
+LICENSE_RETRY_MAX_DELAY = 4.0
 
 OTII_USERNAME = 'OTII_USERNAME'
 OTII_PASSWORD = 'OTII_PASSWORD'
@@ -31,6 +37,41 @@ LICENSE_MAP = {
     'Standard':   [],
 }
 
+# License types that cover each license in LICENSE_MAP
+WANTED_LICENSE_TYPES = {
+    wanted_license: frozenset(
+        license_type for license_type, covered in LICENSE_MAP.items() if wanted_license in covered)
+    for covered in LICENSE_MAP.values()
+    for wanted_license in covered
+}
+
+@functools.lru_cache(maxsize = 8)
+def _load_credentials(path, mtime):
+    # pylint: disable=missing-function-docstring,unused-argument
+    # The modification time is part of the cache key, so an edited file is read again
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def _licenses_to_reserve(licenses, all_licenses):
+    # pylint: disable=missing-function-docstring
+    license_ids = []
+    for wanted_license in licenses:
+        license_types = WANTED_LICENSE_TYPES.get(wanted_license, frozenset())
+        first_available = None
+        for lic in all_licenses:
+            if not lic.available or lic.type not in license_types:
+                continue
+            if lic.reserved_to != '':
+                # Already reserved, nothing to reserve for this license
+                first_available = None
+                break
+            if first_available is None:
+                first_available = lic.id
+        # A license covering several wanted licenses is only reserved once
+        if first_available is not None and first_available not in license_ids:
+            license_ids.append(first_available)
+    return license_ids
+
 class Connect(otii.Otii):
     # pylint: disable=missing-class-docstring
     def __init__(self,
@@ -40,25 +81,41 @@ class Connect(otii.Otii):
                  licensing,
                  credentials,
                  licenses,
+                 pool_size = None,
+                 threaded = False,
+                 reuse_connection = False,
                  ):
         self.auto_logged_in = False
         self.auto_reserved_licenses = []
+        self.reuse_connection = reuse_connection and pool_size is None and not threaded
 
-        connection = otii_connection.OtiiConnection(host, port)
-        connect_response = connection.connect_to_server(try_for_seconds = try_for_seconds)
-        if connect_response['type'] == 'error':
-            raise otii_exception.Otii_Exception(connect_response)
+        if self.reuse_connection:
+            connection = otii_connection.acquire(host, port, try_for_seconds = try_for_seconds)
+        else:
+            if pool_size is not None:
+                connection = otii_connection.OtiiConnectionPool(host, port, pool_size)
+            elif threaded:
+                connection = otii_connection.ThreadedOtiiConnection(host, port)
+            else:
+                connection = otii_connection.OtiiConnection(host, port)
+            connect_response = connection.connect_to_server(try_for_seconds = try_for_seconds)
+            try:
+                otii_connection.response_data(connect_response)
+            except otii_exception.Otii_Exception:
+                connection.close_connection()
+                raise
         super().__init__(connection)
 
         if licensing == LicensingMode.AUTO:
             try:
-                self.get_licenses()
+                all_licenses = self.get_licenses(as_tuples = True)
             except otii_exception.Otii_Exception:
                 self._login(credentials)
                 self.auto_logged_in = True
+                all_licenses = self.get_licenses(as_tuples = True)
 
             wanted_licenses = [ 'Automation' ] if licenses is None else licenses
-            self._reserve_licenses(wanted_licenses)
+            self._reserve_licenses(wanted_licenses, all_licenses)
 
     def __enter__(self):
         return self
@@ -69,9 +126,8 @@ class Connect(otii.Otii):
     def _login(self, credentials_path):
         # pylint: disable=missing-function-docstring
         if os.path.isfile(credentials_path):
-            with open(credentials_path, encoding='utf-8') as file:
-                credentials = json.load(file)
-                self.login(credentials['username'], credentials['password'])
+            credentials = _load_credentials(credentials_path, os.stat(credentials_path).st_mtime_ns)
+            self.login(credentials['username'], credentials['password'])
         else:
             try:
                 username = os.environ[OTII_USERNAME]
@@ -80,31 +136,33 @@ class Connect(otii.Otii):
             except KeyError:
                 pass
 
-    def _reserve_licenses(self, licenses):
+    def _reserve_licenses(self, licenses, all_licenses):
         # pylint: disable=missing-function-docstring
-        all_licenses = self.get_licenses()
-        for wanted_license in licenses:
-            reserved_by_me = [
-                license
-                for license in all_licenses
-                if license['reserved_to'] != ''
-                    and license['available']
-                    and license['type'] in LICENSE_MAP
-                    and wanted_license in LICENSE_MAP[license['type']]
-            ]
-            available = [
-                license
-                for license in all_licenses
-                if license['reserved_to'] == ''
-                    and license['available']
-                    and license['type'] in LICENSE_MAP
-                    and wanted_license in LICENSE_MAP[license['type']]
-            ]
-            if len(reserved_by_me) == 0:
-                if len(available) > 0:
-                    license_id = available[0]['id']
-                    self.reserve_license(license_id)
-                    self.auto_reserved_licenses.append(license_id)
+        delay = LICENSE_RETRY_DELAY
+        for attempt in range(LICENSE_RESERVE_ATTEMPTS):
+            license_ids = _licenses_to_reserve(licenses, all_licenses)
+            # All licenses are reserved in one round trip
+            responses = self.connection.send_and_receive_many([
+                {"type": "request", "cmd": "otii_reserve_license", "data": {"license_id": license_id}}
+                for license_id in license_ids
+            ])
+            error = None
+            for license_id, response in zip(license_ids, responses):
+                try:
+                    otii_connection.response_data(response)
+                except otii_exception.Otii_Exception as exception:
+                    error = exception
+                    continue
+                self.auto_reserved_licenses.append(license_id)
+            if error is None:
+                return
+            if attempt == LICENSE_RESERVE_ATTEMPTS - 1:
+                raise error
+            # Another client may have reserved the license first. Clients started at the
+            # same time wait for a random time, so they do not collide again.
+            time.sleep(random.uniform(0, delay))
+            delay = min(2 * delay, LICENSE_RETRY_MAX_DELAY)
+            all_licenses = self.get_licenses(as_tuples = True)
 
     def disconnect(self):
         # pylint: disable=missing-function-docstring
@@ -112,7 +170,10 @@ class Connect(otii.Otii):
             self.return_license(license_id)
         if self.auto_logged_in:
             self.logout()
-        self.connection.close_connection()
+        if self.reuse_connection:
+            otii_connection.release(self.connection)
+        else:
+            self.connection.close_connection()
 
 class OtiiClient:
     """ Use this class to easily create a connected Otii object."""
@@ -126,6 +187,9 @@ class OtiiClient:
                 licensing = DEFAULT_LICENSING_MODE,
                 credentials = DEFAULT_CREDENTIALS,
                 licenses = DEFAULT_LICENSES,
+                pool_size = None,
+                threaded = False,
+                reuse_connection = False,
                 ):
         """ Connect to Otii.
 
@@ -147,9 +211,18 @@ class OtiiClient:
             licensing (str): 'auto' or 'manual'.
             credentials (str): Path to a file containing credentials.
             licenses (str[]): Array of license types ('Automation', 'Battery') needed.
+            pool_size (int, optional): Number of connections for Otii commands, to use the Otii object
+            from several threads. Each device then also gets a connection of its own. One connection if not set.
+            threaded (bool, optional): True to read responses in a background thread, so that
+            several threads can share the single connection. Not used with pool_size.
+            reuse_connection (bool, optional): True to keep the connection open when disconnecting,
+            and reuse it for the next connect to the same host and port, instead of connecting
+            again. Not used with pool_size or threaded.
 
         """
-        self.otii = Connect(host, port, try_for_seconds, licensing, credentials, licenses)
+        self.otii = Connect(
+            host, port, try_for_seconds, licensing, credentials, licenses, pool_size, threaded,
+            reuse_connection)
         return self.otii
 
     def disconnect(self):
@@ -1,44 +1,87 @@
 #!/usr/bin/env python3
 # pylint: disable=missing-module-docstring
-import datetime
-import json
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import itertools
+import queue
 import socket
+import threading
 import time
+from typing import Dict, List, Tuple
+from otii_tcp_client import framing, otii_exception
+# Shared with otii_connection_async, and kept importable from this module
+from otii_tcp_client.otii_connection_common import (  # pylint: disable=unused-import
+    CONNECT_ATTEMPT_TIMEOUT, CONNECT_RETRY_DELAY, CONNECT_RETRY_MAX_DELAY, NOTIFICATION_TYPES, TCP_FAMILIES,
+    DisconnectedException, enable_keepalive, get_new_trans_id, is_unix_socket_path, notify_subscribers, response_data,
+)
 
-class DisconnectedException(Exception):
-    # pylint: disable=missing-class-docstring
-    pass
+def __getattr__(name):
+    # AsyncOtiiConnection lives in its own module, so that asyncio is only
+    # imported by programs that use it
+    # pylint: disable=import-outside-toplevel
+    if name == "AsyncOtiiConnection":
+        from otii_tcp_client import otii_connection_async
+        return otii_connection_async.AsyncOtiiConnection
+    raise AttributeError("module " + __name__ + " has no attribute " + name)
 
-trans_id = 0
-
-def get_new_trans_id():
-    # pylint: disable=missing-function-docstring
-    global trans_id
-    trans_id += 1
-    return str(trans_id)
+# Number of timed out requests whose late responses are remembered, and dropped
+MAX_ABANDONED = 1024
 
 class OtiiConnection:
     """ Class to define the server connection handler
 
+    The connection is meant to be long lived. Create one connection, and share it
+    between the Otii object and all devices, instead of connecting for each command.
+
     Attributes:
-        host_address (str): Server IP address.
+        host_address (str): Server IP address, or path of a Unix domain socket.
         host_port (int): Connection port number.
-        recv_buffer (int): Size of receive buffer.
+        recv_buffer (int): Initial size of receive buffer, 256 kB.
+        keepalive (bool): True to enable TCP keep-alive on the socket.
+        socket_options (list): (level, option, value) tuples set on the socket after connecting.
         sock (socket): Communication socket.
+        max_unacknowledged (int): Number of requests sent with send_nowait, that can be
+        waiting for their responses before the responses are received.
+        coalesce (bool): True to send commands without waiting, when they come in bursts.
 
     """
-    recv_msg = ""
-
-    def __init__(self, address, port):
+    def __init__(self, address, port, *, keepalive=True, coalesce=False, socket_options=()):
         """
         Args:
-            address (str): Server IP address.
-            port (int): Connection port number.
+            address (str): Server IP address, or absolute path of a Unix domain socket,
+            when the server is on the same host and listens on one.
+            port (int): Connection port number, not used for Unix domain sockets.
+            keepalive (bool, optional): True to enable TCP keep-alive, so a lost connection
+            is detected while idle, default True.
+            coalesce (bool, optional): True to send device commands that do not return a value
+            without waiting for the response, when they are issued faster than half the
+            round trip time. Errors are then raised by the next command that waits, default False.
+            socket_options (list, optional): (level, option, value) tuples to set on the socket
+            after connecting, e.g. to override TCP_NODELAY or the buffer sizes, default none.
+            SO_RCVBUF and SO_SNDBUF are not set by default, as setting them turns off the
+            automatic tuning of the buffer sizes on Linux.
 
         """
         self.host_address = address
         self.host_port = port
-        self.recv_buffer = 128 * 1024
+        self.recv_buffer = 256 * 1024
+        self.keepalive = keepalive
+        self.socket_options = list(socket_options)
+        self._decoder = framing.LineDecoder(self.recv_buffer)
+        self._subscribers = {}
+        self._subscription_ids = itertools.count(1)
+        self._queued = None
+        self._callbacks = {}
+        self._unacknowledged = []
+        self.max_unacknowledged = 64
+        self.coalesce = coalesce
+        self._round_trip_times = collections.deque(maxlen = 8)
+        self._last_request_done = 0
+        self._quickack = False
+        self._timeout = None
+        self._abandoned = collections.OrderedDict()
 
     def close_connection(self):
         """ Close connection to server.
@@ -46,6 +89,26 @@ class OtiiConnection:
         """
         self.sock.close()
 
+    def is_connected(self):
+        """ Check, without waiting, that the connection has not been closed by the server.
+
+        Returns:
+            bool: True if the connection is still open.
+
+        """
+        timeout = self.sock.gettimeout()
+        try:
+            self.sock.setblocking(False)
+            # Peeking leaves any received notification for the next request to handle
+            return self.sock.recv(1, socket.MSG_PEEK) != b""
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            if self.sock.fileno() != -1:
+                self.sock.settimeout(timeout)
+
     def connect_to_server(self, *, try_for_seconds=0):
         """ Connect to server.
 
@@ -56,24 +119,75 @@ class OtiiConnection:
             dict: Decoded JSON connection response.
 
         """
-        start_time = datetime.datetime.now().timestamp()
-        connected = False
-        while not connected:
+        deadline = time.monotonic() + try_for_seconds
+        delay = CONNECT_RETRY_DELAY
+        while True:
+            # An unreachable host does not hold an attempt for the OS connect timeout,
+            # far beyond try_for_seconds
+            remaining = deadline - time.monotonic()
+            timeout = min(remaining, CONNECT_ATTEMPT_TIMEOUT) if remaining > 0 else CONNECT_ATTEMPT_TIMEOUT
             try:
-                self.sock = socket.socket(
-                    socket.AF_INET, socket.SOCK_STREAM)
-                self.sock.connect((self.host_address, self.host_port))
-                connected = True
-            except socket.error:
-                elapsed_time = datetime.datetime.now().timestamp() - start_time
-                if elapsed_time > try_for_seconds:
-                    self.sock.close()
+                if is_unix_socket_path(self.host_address):
+                    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    try:
+                        sock.settimeout(timeout)
+                        sock.connect(self.host_address)
+                    except OSError:
+                        sock.close()
+                        raise
+                    self.sock = sock
+                else:
+                    self.sock = socket.create_connection((self.host_address, self.host_port), timeout)
+                self.sock.settimeout(None)
+                break
+            except OSError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     self.sock = None
                     raise
-                time.sleep(0.5)
+                # Retry soon at first, so a server that is just starting is found without delay
+                time.sleep(min(delay, remaining))
+                delay = min(2 * delay, CONNECT_RETRY_MAX_DELAY)
+
+        if self.sock.family in TCP_FAMILIES:
+            # Requests are small and each one waits for its response, do not delay them with Nagle's algorithm
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Acknowledge responses immediately on Linux, so the server does not wait for
+        # a delayed ack before sending the rest of a large response
+        self._quickack = self.sock.family in TCP_FAMILIES and hasattr(socket, "TCP_QUICKACK")
+        self._timeout = self.sock.gettimeout()
+
+        if self.keepalive:
+            enable_keepalive(self.sock)
+        for level, option, value in self.socket_options:
+            self.sock.setsockopt(level, option, value)
 
         return self.receive_response(3, "")
 
+    def reconnect(self, *, try_for_seconds=0):
+        """ Close the socket and connect to server again.
+
+        Args:
+            try_for_seconds (int): Seconds to try to connect.
+
+        Returns:
+            dict: Decoded JSON connection response.
+
+        Raises:
+            Otii_Exception: If the server refuses the connection.
+
+        """
+        self.close_connection()
+        self._decoder.reset()
+        self._abandoned.clear()
+        connect_response = self.connect_to_server(try_for_seconds = try_for_seconds)
+        try:
+            response_data(connect_response)
+        except otii_exception.Otii_Exception:
+            self.close_connection()
+            raise
+        return connect_response
+
     def receive_response(self, timeout_seconds, trans_id):
         """ Receive a JSON formated response from the server.
 
@@ -86,35 +200,47 @@ class OtiiConnection:
 
         """
         response = None
-        self.sock.settimeout(timeout_seconds)
+        self._set_timeout(timeout_seconds)
         while not response:
-            try:
-                recv_data = self.sock.recv(self.recv_buffer)
-                if len(recv_data) == 0:
-                    raise DisconnectedException()
-            except ConnectionResetError:
-                raise DisconnectedException()
-            self.recv_msg += recv_data.decode("utf-8")
-            items = self.recv_msg.split("\r\n")
-            self.recv_msg = items.pop()
-            for item in items:
-                json_data = json.loads(item)
+            for json_data in self._receive_items():
                 if json_data["type"] == "information":
                     response = json_data
                 elif json_data["type"] == "progress":
-                    pass
+                    self._notify(json_data)
                 elif json_data["trans_id"] != trans_id:
                     raise Exception("Transaction id mismatch")
                 else:
                     response = json_data
         return response
 
+    def _set_timeout(self, timeout):
+        # pylint: disable=missing-function-docstring
+        # Setting the timeout makes system calls, so it is only set when it changes
+        if timeout != self._timeout:
+            self.sock.settimeout(timeout)
+            self._timeout = timeout
+
+    def _receive_items(self):
+        # pylint: disable=missing-function-docstring
+        try:
+            if self._decoder.recv_into(self.sock) == 0:
+                raise DisconnectedException()
+            if self._quickack:
+                # The kernel turns quick ack off again by itself, so it is set after each receive
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        except ConnectionResetError:
+            raise DisconnectedException()
+        return self._decoder.messages()
+
+    def _notify(self, notification):
+        # pylint: disable=missing-function-docstring
+        notify_subscribers(self._subscribers, notification)
+
     def send(self, request):
         """ Send request without waiting for response.
 
         """
-        json_msg = json.dumps(request)
-        self.send_request(json_msg)
+        self.send_bytes(framing.dumps(request) + framing.DELIMITER)
 
     def send_and_receive(self, request, timeout=3):
         """ Send request and receive response from server.
@@ -127,26 +253,701 @@ class OtiiConnection:
             dict: Decoded JSON server response.
 
         """
-        request["trans_id"] = get_new_trans_id()
-        json_msg = json.dumps(request)
-        self.send_request(json_msg)
-        data = self.receive_response(timeout, request["trans_id"])
-        if data["trans_id"] != request["trans_id"]:
-            data["error"] = "Unexpected Transmission ID"
+        trans_id = get_new_trans_id()
+        return self._transfer(trans_id, framing.encode_request(request, trans_id), timeout)
+
+    def request(self, cmd, data=None, timeout=3):
+        """ Send a command and return the data of the response.
+
+        Args:
+            cmd (str): Command to send.
+            data (dict, optional): Data of the command.
+            timeout (int, optional): Transmission timeout (s), default 3s. None to block.
+
+        Returns:
+            dict: Data of the server response, None if the response has no data.
+
+        Raises:
+            Otii_Exception: If the server returned an error.
+
+        """
+        request = {"type": "request", "cmd": cmd}
+        if data is not None:
+            request["data"] = data
+        return response_data(self.send_and_receive(request, timeout))
+
+    def send_encoded_and_receive(self, encoded_request, timeout=3):
+        """ Send an already JSON encoded request and receive response from server.
+
+        Useful for requests that are sent repeatedly, as they only have to be encoded once.
+
+        Args:
+            encoded_request (bytes): JSON encoded server request, without trans_id.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            dict: Decoded JSON server response.
+
+        """
+        trans_id = get_new_trans_id()
+        return self._transfer(trans_id, framing.add_trans_id(encoded_request, trans_id), timeout)
+
+    def send_and_receive_many(self, requests, timeout=3):
+        """ Send several requests at once and receive all responses from server.
+
+        The requests are written to the socket back-to-back, so the total time is
+        about one round trip instead of one round trip per request.
+
+        Args:
+            requests (list): List of server requests.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            list: Decoded JSON server responses, in the same order as the requests.
+
+        """
+        messages = []
+        for request in requests:
+            trans_id = get_new_trans_id()
+            messages.append((trans_id, framing.encode_request(request, trans_id)))
+        return self._transfer_many(messages, timeout)
+
+    def send_encoded_and_receive_many(self, encoded_requests, timeout=3):
+        """ Send several already JSON encoded requests at once and receive all responses from server.
+
+        Args:
+            encoded_requests (list): JSON encoded server requests, without trans_id.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            list: Decoded JSON server responses, in the same order as the requests.
+
+        """
+        messages = []
+        for encoded_request in encoded_requests:
+            trans_id = get_new_trans_id()
+            messages.append((trans_id, framing.add_trans_id(encoded_request, trans_id)))
+        return self._transfer_many(messages, timeout)
+
+    def send_nowait(self, request):
+        """ Send request without waiting for the response.
+
+        The response is received and checked for errors by the next request that
+        waits for its response, or by flush.
+
+        Args:
+            request (dict): Server request.
+
+        Raises:
+            Otii_Exception: If max_unacknowledged requests are already waiting,
+            and the server returned an error for one of them.
+
+        """
+        if len(self._unacknowledged) >= self.max_unacknowledged:
+            self.flush()
+        trans_id = get_new_trans_id()
+        self._expect([trans_id])
+        self.send_bytes(framing.encode_request(request, trans_id))
+        self._unacknowledged.append(trans_id)
+        self._last_request_done = time.perf_counter()
+
+    @property
+    def round_trip_time(self):
+        """ float: Mean time (s) of the last few requests, or None before the first request. """
+        if not self._round_trip_times:
+            return None
+        return sum(self._round_trip_times) / len(self._round_trip_times)
+
+    @property
+    def bursting(self):
+        """ bool: True if coalesce is enabled, and requests are issued faster than half the round trip time. """
+        if not self.coalesce or not self._round_trip_times:
+            return False
+        return time.perf_counter() - self._last_request_done < self.round_trip_time / 2
+
+    @property
+    def pipelining(self):
+        """ bool: True if requests are queued by an active pipeline. """
+        return self._queued is not None
+
+    @contextlib.contextmanager
+    def pipeline(self):
+        """ Context manager that queues requests and sends them together.
+
+        Inside the context, requests added with queue are held back until the
+        context is left, or until a request that needs its response is sent.
+        All held back requests are then written to the socket at once, together with
+        that request, so a sequence of commands costs about one round trip.
+
+        Raises:
+            Otii_Exception: If the server returned an error for a queued request.
+
+        """
+        if self._queued is not None:
+            yield
+            return
+        self._queued = []
+        try:
+            yield
+            self.flush()
+        finally:
+            self._queued = None
+            self._callbacks.clear()
+
+    def queue(self, request, callback=None):
+        """ Queue a request in the active pipeline.
+
+        The response is only checked for errors, when the request has been sent.
+
+        Args:
+            request (dict): Server request.
+            callback (function, optional): Function called with the decoded JSON response,
+            when the request has been sent.
+
+        """
+        trans_id = get_new_trans_id()
+        self._queued.append((trans_id, framing.encode_request(request, trans_id)))
+        if callback is not None:
+            self._callbacks[trans_id] = callback
+
+    def flush(self, timeout=3):
+        """ Send all queued requests and check their responses.
+
+        Also receives the responses of requests sent with send_nowait.
+
+        Args:
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Raises:
+            Otii_Exception: If the server returned an error for a queued request.
+
+        """
+        if self._queued or self._unacknowledged:
+            self._transfer_many([], timeout)
+
+    def _transfer(self, trans_id, msg, timeout):
+        # pylint: disable=missing-function-docstring
+        start = time.perf_counter()
+        if self._queued or self._unacknowledged:
+            data = self._transfer_many([(trans_id, msg)], timeout)[0]
+        else:
+            self._expect([trans_id])
+            try:
+                self.send_bytes(msg)
+            except (BrokenPipeError, ConnectionResetError):
+                # The request never reached the server, so it is safe to send it once more
+                self.reconnect()
+                self._expect([trans_id])
+                self.send_bytes(msg)
+            data = self._collect([trans_id], timeout)[0]
+        self._last_request_done = time.perf_counter()
+        self._round_trip_times.append(self._last_request_done - start)
         return data
 
+    def _transfer_many(self, messages, timeout):
+        # pylint: disable=missing-function-docstring
+        queued = []
+        if self._queued:
+            queued, self._queued = self._queued, []
+            messages = queued + messages
+        # Requests sent with send_nowait are already on their way, only collect their responses
+        unacknowledged, self._unacknowledged = self._unacknowledged, []
+        trans_ids = [trans_id for trans_id, _ in messages]
+        self._expect(trans_ids)
+        self.send_bytes(b"".join(msg for _, msg in messages))
+        responses = self._collect(unacknowledged + trans_ids, timeout)
+        if self._callbacks:
+            for trans_id, response in zip(trans_ids, responses[len(unacknowledged):]):
+                callback = self._callbacks.pop(trans_id, None)
+                if callback is not None:
+                    callback(response)
+        not_waited_for = len(unacknowledged) + len(queued)
+        for response in responses[:not_waited_for]:
+            response_data(response)
+        return responses[not_waited_for:]
+
+    def _expect(self, trans_ids):
+        # pylint: disable=missing-function-docstring
+        # Called before requests are sent. Responses are read by _collect on this connection.
+        pass
+
+    def _collect(self, trans_ids, timeout):
+        # pylint: disable=missing-function-docstring
+        responses = dict.fromkeys(trans_ids)
+        received = 0
+        self._set_timeout(timeout)
+        try:
+            while received < len(responses):
+                for json_data in self._receive_items():
+                    if json_data["type"] in NOTIFICATION_TYPES:
+                        self._notify(json_data)
+                        continue
+                    trans_id = json_data["trans_id"]
+                    if trans_id in self._abandoned:
+                        # Late response to a request that timed out
+                        del self._abandoned[trans_id]
+                        continue
+                    if trans_id not in responses or responses[trans_id] is not None:
+                        raise Exception("Transaction id mismatch")
+                    responses[trans_id] = json_data
+                    received += 1
+        except socket.timeout:
+            # Responses still on their way are dropped when they arrive, instead of
+            # being taken for the responses of the next request
+            self._abandoned.update(
+                (trans_id, None) for trans_id, response in responses.items() if response is None)
+            # A response that never arrives is forgotten when newer requests time out
+            while len(self._abandoned) > MAX_ABANDONED:
+                self._abandoned.popitem(last = False)
+            raise
+        return list(responses.values())
+
     def send_request(self, message):
         """ Send request to server.
 
         Args:
-            message (str): JSON encoded server request.
+            message (str or bytes): JSON encoded server request, e.g. from orjson.dumps.
+
+        """
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        self.send_bytes(message + framing.DELIMITER)
+
+    def send_bytes(self, msg):
+        """ Send encoded data to server.
+
+        Args:
+            msg (bytes): Encoded server requests, including line endings.
+
+        """
+        # sendall retries partial sends in C, without copying the rest of the message
+        self.sock.sendall(msg)
+
+    def subscribe(self, callback):
+        """ Subscribe to notifications pushed by the server.
+
+        The server pushes progress notifications while running commands that
+        have progress enabled, e.g. otii.open_project and project.save_as, and
+        information messages that are not responses to a request.
+        The callback is called from the thread waiting for the response.
+        An exception raised by the callback is logged to the "otii_tcp_client" logger.
+
+        Args:
+            callback (function): Function called with each decoded JSON notification.
+
+        Returns:
+            int: Subscription token to pass to unsubscribe.
+
+        """
+        token = next(self._subscription_ids)
+        self._subscribers[token] = callback
+        return token
+
+    def unsubscribe(self, token):
+        """ Stop receiving notifications.
+
+        Args:
+            token (int): Subscription token returned by subscribe.
+
+        """
+        self._subscribers.pop(token, None)
+
+class ThreadedOtiiConnection(OtiiConnection):
+    """ Class to define a server connection handler with a reader thread
+
+    A background thread reads all responses, and hands each response to the
+    thread waiting for it, through a queue per transaction id. If the
+    connection is closed, all waiting threads get a DisconnectedException. Several threads can
+    then share the connection, and a command with a long timeout, e.g.
+    arc.wait_for_battery_data, only blocks the thread that sent it.
+
+    Pipelines and requests sent with send_nowait are tracked per connection,
+    and should only be used from one thread at a time. Use submit to have
+    several requests in flight from one thread.
+
+    """
+    def __init__(self, address, port, *, keepalive=True, coalesce=False, socket_options=()):
+        """
+        Args:
+            address (str): Server IP address, or absolute path of a Unix domain socket.
+            port (int): Connection port number.
+            keepalive (bool, optional): True to enable TCP keep-alive, default True.
+            coalesce (bool, optional): True to send commands in bursts without waiting, default False.
+            socket_options (list, optional): (level, option, value) tuples to set on the socket, default none.
 
         """
-        totalsent = 0
-        message = message + "\r\n"
-        msg = message.encode("utf-8")
-        while totalsent < len(msg):
-            sent = self.sock.send(msg[totalsent:])
-            if sent == 0:
-                raise RuntimeError("socket connection broken")
-            totalsent = totalsent + sent
+        super().__init__(address, port, keepalive = keepalive, coalesce = coalesce, socket_options = socket_options)
+        self._send_lock = threading.Lock()
+        self._waiting_lock = threading.Lock()
+        self._waiting = {}
+        self._disconnected = True
+        self._reader_thread = None
+
+    def connect_to_server(self, *, try_for_seconds=0):
+        """ Connect to server, and start the reader thread.
+
+        Args:
+            try_for_seconds (int): Seconds to try to connect.
+
+        Returns:
+            dict: Decoded JSON connection response.
+
+        """
+        response = super().connect_to_server(try_for_seconds = try_for_seconds)
+        self._set_timeout(None)
+        self._waiting = {}
+        self._disconnected = False
+        self._reader_thread = threading.Thread(
+            target = self._read_responses, args = (self._waiting,), daemon = True)
+        self._reader_thread.start()
+        return response
+
+    def close_connection(self):
+        """ Close connection to server, and stop the reader thread.
+
+        """
+        try:
+            # Wakes up the reader thread blocked in recv
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        if self._reader_thread is not None and self._reader_thread is not threading.current_thread():
+            self._reader_thread.join()
+        self._reader_thread = None
+
+    def _read_responses(self, waiting):
+        # pylint: disable=missing-function-docstring
+        try:
+            while True:
+                for json_data in self._receive_items():
+                    if json_data["type"] in NOTIFICATION_TYPES:
+                        self._notify(json_data)
+                        continue
+                    trans_id = json_data.get("trans_id")
+                    waiter = waiting.get(trans_id)
+                    if isinstance(waiter, queue.SimpleQueue):
+                        waiter.put(json_data)
+                    elif waiter is not None:
+                        # A future from submit, that no thread collects
+                        with self._waiting_lock:
+                            waiting.pop(trans_id, None)
+                        # The caller may have cancelled the future with cancel(), then it is not completed
+                        if waiter.set_running_or_notify_cancel():
+                            waiter.set_result(json_data)
+        except (DisconnectedException, OSError):
+            pass
+        finally:
+            # Wake up all waiting threads, and refuse new requests until connected again,
+            # also if the reader ended on an unexpected error, e.g. a message that is not JSON
+            with self._waiting_lock:
+                self._disconnected = True
+                for waiter in waiting.values():
+                    if isinstance(waiter, queue.SimpleQueue):
+                        waiter.put(DisconnectedException())
+                    elif waiter.set_running_or_notify_cancel():
+                        waiter.set_exception(DisconnectedException())
+
+    def _expect(self, trans_ids):
+        # pylint: disable=missing-function-docstring
+        with self._waiting_lock:
+            if self._disconnected:
+                raise DisconnectedException()
+            for trans_id in trans_ids:
+                self._waiting[trans_id] = queue.SimpleQueue()
+
+    def _collect(self, trans_ids, timeout):
+        # pylint: disable=missing-function-docstring
+        waiting = self._waiting
+        responses = []
+        try:
+            for trans_id in trans_ids:
+                try:
+                    response = waiting[trans_id].get(timeout = timeout)
+                except queue.Empty:
+                    raise socket.timeout("timed out") from None
+                if isinstance(response, Exception):
+                    raise response
+                responses.append(response)
+            return responses
+        finally:
+            with self._waiting_lock:
+                for trans_id in trans_ids:
+                    waiting.pop(trans_id, None)
+
+    def submit(self, request):
+        """ Send request, and get a future for its response.
+
+        The reader thread completes the future when the response arrives, so
+        the sending thread can have several requests in flight, e.g. read
+        device settings while a project is saved.
+
+        .. code-block:: python
+
+            future = connection.submit(request)
+            response = future.result(timeout = 3)
+
+        Args:
+            request (dict): Server request.
+
+        Returns:
+            concurrent.futures.Future: Future of the decoded JSON server response.
+
+        Raises:
+            DisconnectedException: If the connection is closed.
+
+        """
+        trans_id = get_new_trans_id()
+        future = concurrent.futures.Future()
+        with self._waiting_lock:
+            if self._disconnected:
+                raise DisconnectedException()
+            self._waiting[trans_id] = future
+        try:
+            self.send_bytes(framing.encode_request(request, trans_id))
+        except OSError:
+            with self._waiting_lock:
+                self._waiting.pop(trans_id, None)
+            raise
+        return future
+
+    def send_bytes(self, msg):
+        """ Send encoded data to server.
+
+        Args:
+            msg (bytes): Encoded server requests, including line endings.
+
+        """
+        with self._send_lock:
+            super().send_bytes(msg)
+
+class OtiiConnectionPool:
+    """ Class to define a pool of server connections
+
+    Each device created with a pool gets a connection of its own, opened for
+    it and never used by anything else, so commands to one device do not have
+    to wait behind commands to another device running in a different thread.
+    Each command to the Otii object itself takes a connection that no other
+    Otii command is using, so several threads can use the Otii object at once.
+
+    Attributes:
+        connections (list): The :obj:OtiiConnection objects used by Otii commands.
+        device_connections (list): The :obj:OtiiConnection objects opened for devices.
+
+    """
+    def __init__(self, address, port, size=4, *, keepalive=True, coalesce=False, socket_options=()):
+        """
+        Args:
+            address (str): Server IP address, or absolute path of a Unix domain socket.
+            port (int): Connection port number.
+            size (int, optional): Number of connections in the pool, default 4.
+            keepalive (bool, optional): True to enable TCP keep-alive, default True.
+            coalesce (bool, optional): True to send commands in bursts without waiting, default False.
+            socket_options (list, optional): (level, option, value) tuples to set on each socket, default none.
+
+        """
+        self._address = address
+        self._port = port
+        self._options = {"keepalive": keepalive, "coalesce": coalesce, "socket_options": socket_options}
+        self.connections = [OtiiConnection(address, port, **self._options) for _ in range(size)]
+        self.device_connections = []
+        self._device_connections_lock = threading.Lock()
+        self._idle = queue.Queue()
+        for connection in self.connections:
+            self._idle.put(connection)
+
+    def close_connection(self):
+        """ Close all connections to server.
+
+        """
+        with self._device_connections_lock:
+            device_connections, self.device_connections = self.device_connections, []
+        for connection in self.connections + device_connections:
+            connection.close_connection()
+
+    def connect_to_server(self, *, try_for_seconds=0):
+        """ Connect all connections in the pool to server.
+
+        Args:
+            try_for_seconds (int): Seconds to try to connect.
+
+        Returns:
+            dict: Decoded JSON connection response of the first connection.
+
+        """
+        responses = [
+            connection.connect_to_server(try_for_seconds = try_for_seconds)
+            for connection in self.connections
+        ]
+        return responses[0]
+
+    def next(self):
+        """ Open a new connection for a device.
+
+        The connection is not shared with Otii commands or with other devices,
+        as a plain :obj:OtiiConnection must only be used by one thread at a time.
+        It is closed by close_connection.
+
+        Returns:
+            :obj:OtiiConnection: Connection to use.
+
+        Raises:
+            Otii_Exception: If the server refuses the connection.
+
+        """
+        connection = OtiiConnection(self._address, self._port, **self._options)
+        try:
+            response_data(connection.connect_to_server())
+        except otii_exception.Otii_Exception:
+            connection.close_connection()
+            raise
+        with self._device_connections_lock:
+            self.device_connections.append(connection)
+        return connection
+
+    @property
+    def pipelining(self):
+        """ bool: Always False, requests sent through the pool are not pipelined. """
+        return False
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """ Context manager that takes a connection no other Otii command is using.
+
+        Waits until a connection is returned, if all of them are in use.
+
+        .. code-block:: python
+
+            with pool.acquire() as connection:
+                connection.send_and_receive(request)
+
+        Returns:
+            Context manager giving the :obj:OtiiConnection to use.
+
+        """
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def send_and_receive(self, request, timeout=3):
+        """ Send request on an idle connection and receive response from server.
+
+        Args:
+            request (dict): Server request.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            dict: Decoded JSON server response.
+
+        """
+        with self.acquire() as connection:
+            return connection.send_and_receive(request, timeout)
+
+    def send_encoded_and_receive(self, encoded_request, timeout=3):
+        """ Send an already JSON encoded request on an idle connection and receive response from server.
+
+        Args:
+            encoded_request (bytes): JSON encoded server request, without trans_id.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            dict: Decoded JSON server response.
+
+        """
+        with self.acquire() as connection:
+            return connection.send_encoded_and_receive(encoded_request, timeout)
+
+    def send_and_receive_many(self, requests, timeout=3):
+        """ Send several requests at once on an idle connection and receive all responses from server.
+
+        Args:
+            requests (list): List of server requests.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            list: Decoded JSON server responses, in the same order as the requests.
+
+        """
+        with self.acquire() as connection:
+            return connection.send_and_receive_many(requests, timeout)
+
+    def request(self, cmd, data=None, timeout=3):
+        """ Send a command on an idle connection and return the data of the response.
+
+        Args:
+            cmd (str): Command to send.
+            data (dict, optional): Data of the command.
+            timeout (int, optional): Transmission timeout (s), default 3s. None to block.
+
+        Returns:
+            dict: Data of the server response, None if the response has no data.
+
+        Raises:
+            Otii_Exception: If the server returned an error.
+
+        """
+        with self.acquire() as connection:
+            return connection.request(cmd, data, timeout)
+
+# Connections given back with release, by (address, port)
+_idle_connections: Dict[Tuple[str, int], List[OtiiConnection]] = {}
+_idle_connections_lock = threading.Lock()
+
+def acquire(address, port, *, try_for_seconds=0):
+    """ Get a connection to the server, reusing one given back with release.
+
+    A new connection is only made when there is no open idle connection to the
+    same address and port, so a program that runs commands now and then, e.g.
+    otii_control called from a script, does not connect for each of them.
+
+    Args:
+        address (str): Server IP address, or absolute path of a Unix domain socket.
+        port (int): Connection port number.
+        try_for_seconds (int, optional): Seconds to try to connect, when a new connection is made.
+
+    Returns:
+        :obj:OtiiConnection: Connection to server.
+
+    Raises:
+        Otii_Exception: If the server refuses a new connection.
+
+    """
+    with _idle_connections_lock:
+        connections = _idle_connections.get((address, port), [])
+        while connections:
+            connection = connections.pop()
+            if connection.is_connected():
+                return connection
+            connection.close_connection()
+    connection = OtiiConnection(address, port)
+    connect_response = connection.connect_to_server(try_for_seconds = try_for_seconds)
+    try:
+        response_data(connect_response)
+    except otii_exception.Otii_Exception:
+        connection.close_connection()
+        raise
+    return connection
+
+def release(connection):
+    """ Give back a connection from acquire, keeping it open for the next acquire.
+
+    Idle connections are closed when the program exits.
+
+    Args:
+        connection (:obj:OtiiConnection): Connection that is no longer used.
+
+    """
+    with _idle_connections_lock:
+        key = (connection.host_address, connection.host_port)
+        _idle_connections.setdefault(key, []).append(connection)
+
+@atexit.register
+def _close_idle_connections():
+    # pylint: disable=missing-function-docstring
+    with _idle_connections_lock:
+        for connections in _idle_connections.values():
+            for connection in connections:
+                connection.close_connection()
+        _idle_connections.clear()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# pylint: disable=missing-module-docstring
+import asyncio
+import itertools
+import time
+from otii_tcp_client import framing, otii_connection_common
+
+class AsyncOtiiConnection:
+    """ Class to define an asyncio based server connection handler
+
+    Requests are tagged with a transaction id, and a single reader task
+    dispatches each response to the coroutine waiting for it. This makes
+    it possible to have several requests in flight at the same time,
+    e.g. when controlling many devices with asyncio.gather.
+
+    Attributes:
+        host_address (str): Server IP address, or path of a Unix domain socket.
+        host_port (int): Connection port number.
+        recv_buffer (int): Largest number of bytes read at a time, 256 kB.
+        reader (asyncio.StreamReader): Stream to read responses from.
+        writer (asyncio.StreamWriter): Stream to write requests to.
+        keepalive (bool): True to enable TCP keep-alive on the socket.
+
+    """
+    def __init__(self, address, port, *, keepalive=True):
+        """
+        Args:
+            address (str): Server IP address, or absolute path of a Unix domain socket.
+            port (int): Connection port number, not used for Unix domain sockets.
+            keepalive (bool, optional): True to enable TCP keep-alive, so a lost connection
+            is detected while idle, default True.
+
+        """
+        self.host_address = address
+        self.host_port = port
+        self.keepalive = keepalive
+        self.recv_buffer = 256 * 1024
+        self.reader = None
+        self.writer = None
+        self._decoder = framing.LineDecoder(self.recv_buffer)
+        self._pending = {}
+        self._reader_task = None
+        self._disconnected = True
+        self._subscribers = {}
+        self._subscription_ids = itertools.count(1)
+
+    async def close_connection(self):
+        """ Close connection to server.
+
+        """
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        self._fail_pending()
+        # There is no stream if connect_to_server was not called, or failed
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+    async def connect_to_server(self, *, try_for_seconds=0):
+        """ Connect to server.
+
+        Args:
+            try_for_seconds (int): Seconds to try to connect.
+
+        Returns:
+            dict: Decoded JSON connection response.
+
+        """
+        deadline = time.monotonic() + try_for_seconds
+        delay = otii_connection_common.CONNECT_RETRY_DELAY
+        while True:
+            try:
+                if otii_connection_common.is_unix_socket_path(self.host_address):
+                    self.reader, self.writer = await asyncio.open_unix_connection(
+                        self.host_address, limit = self.recv_buffer)
+                else:
+                    # The stream buffers as much as is read at a time, instead of its 64 kB default
+                    self.reader, self.writer = await asyncio.open_connection(
+                        self.host_address, self.host_port, limit = self.recv_buffer)
+                break
+            except OSError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(2 * delay, otii_connection_common.CONNECT_RETRY_MAX_DELAY)
+
+        # asyncio already disables Nagle's algorithm on TCP connections
+        if self.keepalive:
+            otii_connection_common.enable_keepalive(self.writer.get_extra_info("socket"))
+
+        response = None
+        while not response:
+            for item in await asyncio.wait_for(self._receive_items(), 3):
+                if item["type"] == "information":
+                    response = item
+        self._disconnected = False
+        self._reader_task = asyncio.get_running_loop().create_task(self._dispatch_responses())
+        return response
+
+    async def _receive_items(self):
+        # pylint: disable=missing-function-docstring
+        recv_data = await self.reader.read(self.recv_buffer)
+        if len(recv_data) == 0:
+            raise otii_connection_common.DisconnectedException()
+        return self._decoder.feed(recv_data)
+
+    async def _dispatch_responses(self):
+        # pylint: disable=missing-function-docstring
+        try:
+            while True:
+                for item in await self._receive_items():
+                    if item["type"] in otii_connection_common.NOTIFICATION_TYPES:
+                        otii_connection_common.notify_subscribers(self._subscribers, item)
+                        continue
+                    future = self._pending.get(item.get("trans_id"))
+                    if future is not None and not future.done():
+                        future.set_result(item)
+        except (otii_connection_common.DisconnectedException, OSError):
+            # Also when keep-alive finds that the server is gone, e.g. ETIMEDOUT
+            pass
+        finally:
+            # However the reader ended, e.g. a subscriber raised, no response will arrive
+            self._fail_pending()
+
+    def _fail_pending(self):
+        # pylint: disable=missing-function-docstring
+        # Wake up all waiting requests, and refuse new requests until connected again
+        self._disconnected = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(otii_connection_common.DisconnectedException())
+
+    async def send(self, request):
+        """ Send request without waiting for response.
+
+        """
+        self.writer.write(framing.dumps(request) + framing.DELIMITER)
+        await self.writer.drain()
+
+    async def send_and_receive(self, request, timeout=3):
+        """ Send request and receive response from server.
+
+        Other requests can be sent on the same connection while waiting for the response.
+
+        Args:
+            request (dict): Server request.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            dict: Decoded JSON server response.
+
+        """
+        trans_id = otii_connection_common.get_new_trans_id()
+        return await self._transfer(trans_id, framing.encode_request(request, trans_id), timeout)
+
+    async def request(self, cmd, data=None, timeout=3):
+        """ Send a command and return the data of the response.
+
+        Args:
+            cmd (str): Command to send.
+            data (dict, optional): Data of the command.
+            timeout (int, optional): Transmission timeout (s), default 3s. None to block.
+
+        Returns:
+            dict: Data of the server response, None if the response has no data.
+
+        Raises:
+            Otii_Exception: If the server returned an error.
+
+        """
+        request = {"type": "request", "cmd": cmd}
+        if data is not None:
+            request["data"] = data
+        return otii_connection_common.response_data(await self.send_and_receive(request, timeout))
+
+    async def send_encoded_and_receive(self, encoded_request, timeout=3):
+        """ Send an already JSON encoded request and receive response from server.
+
+        Args:
+            encoded_request (bytes): JSON encoded server request, without trans_id.
+            timeout (int, optional): Transmission timeout (s), default 3s.
+
+        Returns:
+            dict: Decoded JSON server response.
+
+        """
+        trans_id = otii_connection_common.get_new_trans_id()
+        return await self._transfer(trans_id, framing.add_trans_id(encoded_request, trans_id), timeout)
+
+    async def _transfer(self, trans_id, msg, timeout):
+        # pylint: disable=missing-function-docstring
+        if self._disconnected:
+            raise otii_connection_common.DisconnectedException()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[trans_id] = future
+        try:
+            self.writer.write(msg)
+            await self.writer.drain()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            del self._pending[trans_id]
+
+    async def send_request(self, message):
+        """ Send request to server.
+
+        Args:
+            message (str or bytes): JSON encoded server request, e.g. from orjson.dumps.
+
+        """
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        self.writer.write(message + framing.DELIMITER)
+        await self.writer.drain()
+
+    def subscribe(self, callback):
+        """ Subscribe to notifications pushed by the server.
+
+        Progress notifications and information messages are passed to the callback,
+        see :obj:OtiiConnection.subscribe.
+
+        Args:
+            callback (function): Function called with each decoded JSON notification.
+
+        Returns:
+            int: Subscription token to pass to unsubscribe.
+
+        """
+        token = next(self._subscription_ids)
+        self._subscribers[token] = callback
+        return token
+
+    def unsubscribe(self, token):
+        """ Stop receiving notifications.
+
+        Args:
+            token (int): Subscription token returned by subscribe.
+
+        """
+        self._subscribers.pop(token, None)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# pylint: disable=missing-module-docstring
+# Helpers shared by the blocking and the asyncio server connections
+import itertools
+import logging
+import socket
+from otii_tcp_client import otii_exception
+
+# Address families of TCP sockets, as create_connection may connect over IPv6
+TCP_FAMILIES = (socket.AF_INET, socket.AF_INET6)
+
+# First and longest wait (s) between attempts to connect
+CONNECT_RETRY_DELAY = 0.05
+CONNECT_RETRY_MAX_DELAY = 0.5
+# Longest time (s) to wait for one attempt to connect
+CONNECT_ATTEMPT_TIMEOUT = 1.0
+
+def is_unix_socket_path(address):
+    """ Check if an address is the path of a Unix domain socket.
+
+    Args:
+        address (str): Server IP address, or absolute path of a Unix domain socket.
+
+    Returns:
+        bool: True if the address is an absolute path, and Unix domain sockets are supported.
+
+    """
+    return hasattr(socket, "AF_UNIX") and address.startswith("/")
+
+def enable_keepalive(sock):
+    """ Enable TCP keep-alive, so a lost connection is detected while idle.
+
+    Does nothing for Unix domain sockets.
+
+    Args:
+        sock (socket): Connected socket.
+
+    """
+    if sock.family not in TCP_FAMILIES:
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 6)
+
+def response_data(response):
+    """ Get the data of a server response.
+
+    Args:
+        response (dict): Decoded JSON server response.
+
+    Returns:
+        dict: The data of the response, None if the response has no data.
+
+    Raises:
+        Otii_Exception: If the response is an error.
+
+    """
+    # Only error responses carry an errorcode, a key lookup avoids comparing the type string
+    if "errorcode" in response:
+        raise otii_exception.Otii_Exception(response)
+    return response.get("data")
+
+class DisconnectedException(Exception):
+    # pylint: disable=missing-class-docstring
+    pass
+
+# Messages pushed by the server, that are passed to subscribers instead of being responses
+NOTIFICATION_TYPES = frozenset(("information", "progress"))
+
+_logger = logging.getLogger("otii_tcp_client")
+
+def notify_subscribers(subscribers, notification):
+    """ Call each subscribed callback with a notification.
+
+    An exception raised by a callback is logged, so one subscriber cannot stop the
+    other subscribers, or lose the responses received together with the notification.
+
+    Args:
+        subscribers (dict): Callbacks by subscription token.
+        notification (dict): Decoded JSON notification.
+
+    """
+    for callback in list(subscribers.values()):
+        try:
+            callback(notification)
+        except Exception:  # pylint: disable=broad-exception-caught
+            _logger.exception("Notification subscriber raised an exception")
+
+# next() on a count is atomic, so threads sharing connections never get the same id
+_trans_ids = itertools.count(1)
+
+def get_new_trans_id():
+    # pylint: disable=missing-function-docstring
+    return str(next(_trans_ids))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import sys
-from otii_tcp_client import otii_connection, otii as otii_application
+from otii_tcp_client import otii_connection, otii_exception, otii as otii_application
 
 def login(otii, username, password):
     otii.login(username, password)
@@ -10,18 +10,18 @@ def logout(otii):
     otii.logout()
 
 def list_licenses(otii):
-    licenses = otii.get_licenses()
+    licenses = otii.get_licenses(as_tuples=True)
     print(f'{"  Id"} {"Type":12} {"Reserved to":15} Hostname')
-    for license in licenses:
-        print(f'{license["id"]:4d} {license["type"]:12} {license["reservedTo"]:15} {license["hostname"]}')
+    for otii_license in licenses:
+        print(f'{otii_license.id:4d} {otii_license.type:12} {otii_license.reserved_to:15} {otii_license.hostname}')
 
-def reserve_license(otii, id):
-    otii.reserve_license(id)
+def reserve_license(otii, license_id):
+    otii.reserve_license(license_id)
 
-def return_license(otii, id):
-    otii.return_license(id)
+def return_license(otii, license_id):
+    otii.return_license(license_id)
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Otii Control')
     subparsers = parser.add_subparsers(dest='command', title='commands', required=True)
 
@@ -34,30 +34,32 @@ def main():
     reserve_parser.add_argument('-i', '--id', dest='id', required=True, help='License id')
     return_parser = subparsers.add_parser('return-license', help='Return license')
     return_parser.add_argument('-i', '--id', dest='id', required=True, help='License id')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     command = args.command
 
-    connection = otii_connection.OtiiConnection('localhost', 1905)
-    connect_response = connection.connect_to_server()
-    if connect_response["type"] == "error":
-        print("Exit! Error code: " + connect_response["errorcode"] + ", Description: " + connect_response["payload"]["message"])
+    # An open connection from an earlier call in the same program is reused
+    try:
+        connection = otii_connection.acquire('localhost', 1905)
+    except otii_exception.Otii_Exception as error:
+        print(f'Exit! Error code: {error.type}, Description: {error.message}')
         sys.exit()
     otii = otii_application.Otii(connection)
 
-    if command == 'login':
-        login(otii, args.username, args.password)
-    elif command == 'logout':
-        logout(otii)
-    elif command == 'list-licenses':
-        list_licenses(otii)
-    elif command == 'reserve-license':
-        reserve_license(otii, int(args.id))
-    elif command == 'return-license':
-        return_license(otii, int(args.id))
-    else:
-        print(f'Unknown command {command}')
-
-    connection.close_connection()
+    try:
+        if command == 'login':
+            login(otii, args.username, args.password)
+        elif command == 'logout':
+            logout(otii)
+        elif command == 'list-licenses':
+            list_licenses(otii)
+        elif command == 'reserve-license':
+            reserve_license(otii, int(args.id))
+        elif command == 'return-license':
+            return_license(otii, int(args.id))
+        else:
+            print(f'Unknown command {command}')
+    finally:
+        otii_connection.release(connection)
 
 if __name__ == '__main__':
     main()
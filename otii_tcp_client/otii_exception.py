@@ -1,4 +1,9 @@
 #!/usr/bin/env python3
+def _missing_key(response):
+    # pylint: disable=missing-function-docstring
+    message = "Error: \"Missing key in request\"\tMissing key: \"" + response["data"]["key"] + "\""
+    return response["cmd"] + " " + message if "cmd" in response else message
+
 class Otii_Exception(Exception):
     """ Class to define an Otii Exception object
 
@@ -7,6 +12,44 @@ class Otii_Exception(Exception):
         message (str): Human readable error message.
 
     """
+    # Functions formatting the message of each error code. Error codes mapped to
+    # None keep the response itself as message.
+    _FORMATTERS = {
+        "Command failure": lambda response:
+            response["cmd"] + " Error: \"Command failure\"\tMessage: \"" + response["data"]["message"] + "\"",
+        "Command not valid for device type": None,
+        "Command timeout": None,
+        "Connection denied": None,
+        "Could not login": None,
+        "Device not connected": lambda response:
+            response["cmd"] + " Error: \"Device not connected\"\tCannot find Arc with ID: \"" + response["data"]["device_id"] + "\"",
+        "Invalid command": lambda response:
+            response["cmd"] + " Error: \"Invalid command\"",
+        "Invalid key type": lambda response:
+            response["cmd"] + " Error: \"Invalid key type\"\tInvalid key: \"" + response["data"]["key"]
+            + "\"\texpected_type: \"" + response["data"]["expected_type"]
+            + "\"\treceived_type: \"" + response["data"]["received_type"] + "\"",
+        "Invalid key value": lambda response:
+            response["cmd"] + " Error: \"Invalid key value\"\tInvalid value: \"" + response["data"]["key"]
+            + "\"\tvalue: \"" + str(response["data"]["value"]) + "\"",
+        "License could not be reserved": None,
+        "License could not be returned": None,
+        "Missing key in request": _missing_key,
+        "No license": None,
+        "Not ready": None,
+        "Not able to parse request": lambda response:
+            response["cmd"] + " Error: \"Not able to parse request\"\tJSON parse error msg: \"" + response["data"]["parse_error"]
+            + "\"\tmessage: \"" + str(response["data"]["data"]) + "\"",
+        "Operation not supported": None,
+        "Project does not exist": None,
+        "Request too large": lambda response:
+            response["cmd"] + " Error: \"Request too large\"\tBytes received when aborted: \"" + response["data"]["read_size"]
+            + "\"\tmax allowed bytes: \"" + str(response["data"]["max_size"]) + "\"",
+        # Temporary to handle unexpected messages when waiting for replay, to be updated when client is updated to handle asynchronous communication
+        "Unexpected Transmission ID": lambda response: "Unexpected transmission ID in received message",
+        "Missing file name": lambda response: "Save failed, no file name specified",
+    }
+
     def __init__(self, response):
         """
         Args:
@@ -14,49 +57,9 @@ class Otii_Exception(Exception):
 
         """
         self.type = response["errorcode"]
-        if self.type == "Command failure":
-            self.message = response["cmd"] + " Error: \"" + self.type + "\"\tMessage: \"" + response["data"]["message"] + "\""
-        elif self.type == "Command not valid for device type":
-            self.message = response
-        elif self.type == "Command timeout":
-            self.message = response
-        elif self.type == "Connection denied":
-            self.message = response
-        elif self.type == "Could not login":
-            self.message = response
-        elif self.type == "Device not connected":
-            self.message = response["cmd"] + " Error: \"" + self.type + "\"\tCannot find Arc with ID: \"" + response["data"]["device_id"] + "\""
-        elif self.type == "Invalid command":
-            self.message = response["cmd"] + " Error: \"" + self.type + "\""
-        elif self.type == "Invalid key type":
-            self.message = response["cmd"] + " Error: \"" + self.type + "\"\tInvalid key: \"" + response["data"]["key"] + "\"\texpected_type: \"" + response["data"]["expected_type"] + "\"\treceived_type: \"" + response["data"]["received_type"] + "\""
-        elif self.type == "Invalid key value":
-            self.message = response["cmd"] + " Error: \"" + self.type + "\"\tInvalid value: \"" + response["data"]["key"] + "\"\tvalue: \"" + str(response["data"]["value"]) + "\""
-        elif self.type == "License could not be reserved":
-            self.message = response
-        elif self.type == "License could not be returned":
-            self.message = response
-        elif self.type == "Missing key in request":
-            if "cmd" in response:
-                self.message = response["cmd"] + " Error: \"" + self.type + "\"\tMissing key: \"" + response["data"]["key"] + "\""
-            else:
-                self.message = "Error: \"" + self.type + "\"\tMissing key: \"" + response["data"]["key"] + "\""
-        elif self.type == "No license":
-            self.message = response
-        elif self.type == "Not ready":
-            self.message = response
-        elif self.type == "Not able to parse request":
-            self.message = response["cmd"] + " Error: \"" + self.type + "\"\tJSON parse error msg: \"" + response["data"]["parse_error"] + "\"\tmessage: \"" + str(response["data"]["data"]) + "\""
-        elif self.type == "Operation not supported":
-            self.message = response
-        elif self.type == "Project does not exist":
-            self.message = response
-        elif self.type == "Request too large":
-            self.message = response["cmd"] + " Error: \"" + self.type + "\"\tBytes received when aborted: \"" + response["data"]["read_size"] + "\"\tmax allowed bytes: \"" + str(response["data"]["max_size"]) + "\""
-        # Temporary to handle unexpected messages when waiting for replay, to be updated when client is updated to handle asynchronous communication
-        elif self.type == "Unexpected Transmission ID":
-            self.message = "Unexpected transmission ID in received message"
-        elif self.type == "Missing file name":
-            self.message = "Save failed, no file name specified"
-        else:
+        try:
+            formatter = self._FORMATTERS[self.type]
+        except KeyError:
             self.message = "Undocumented error: " + str(response)
+        else:
+            self.message = response if formatter is None else formatter(response)
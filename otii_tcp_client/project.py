@@ -10,15 +10,17 @@ class Project:
         connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
 
     """
-    def __init__(self, id, connection):
+    def __init__(self, project_id, connection):
         """
         Args:
-            id (int): ID of project.
+            project_id (int): ID of project.
             filename (str): Name of project. Set when project is opened or saved.
             connection (:obj:OtiiConnection): Object to handle connection to the Otii server.
 
         """
-        self.id = id
+        self.id = project_id
+        # Data of the commands that only take the project id, created once
+        self._id_data = {"project_id": self.id}
         self.filename = ""
         self.connection = connection
 
@@ -30,11 +32,9 @@ class Project:
 
         """
         data = {"project_id": self.id, "force": force}
-        request = {"type": "request", "cmd": "project_close", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("project_close", data)
         self.id = -1
+        self._id_data = {"project_id": self.id}
 
     def crop_data(self, start, end):
         """ Crop all data before start and after end.
@@ -45,11 +45,8 @@ class Project:
 
         """
         data = {"project_id": self.id, "start": start, "end": end}
-        request = {"type": "request", "cmd": "project_crop_data", "data": data}
         # Set timeout to None (blocking) as command can operate over large quantities of data to avoid timeout
-        response = self.connection.send_and_receive(request, None)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("project_crop_data", data, None)
 
     def get_last_recording(self):
         """ Get the latest recording in the project.
@@ -58,15 +55,11 @@ class Project:
             :obj:Recording: Recording Object.
 
         """
-        data = {"project_id": self.id}
-        request = {"type": "request", "cmd": "project_get_last_recording", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        if response["data"]["recording_id"] == -1:
+        response_data = self.connection.request("project_get_last_recording", self._id_data)
+        if response_data["recording_id"] == -1:
             return None
 
-        return recording.Recording(response["data"], self.connection)
+        return recording.Recording(response_data, self.connection)
 
     def get_recordings(self):
         """ List captured recordings.
@@ -75,16 +68,8 @@ class Project:
             list: List of recording objects.
 
         """
-        data = {"project_id": self.id}
-        request = {"type": "request", "cmd": "project_get_recordings", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        recording_objects = []
-        for recording_dict in response["data"]["recordings"]:
-            recording_object = recording.Recording(recording_dict, self.connection)
-            recording_objects.append(recording_object)
-        return recording_objects
+        response_data = self.connection.request("project_get_recordings", self._id_data)
+        return [recording.Recording(recording_dict, self.connection) for recording_dict in response_data["recordings"]]
 
     def save(self, progress=False):
         """ Save the project.
@@ -113,30 +98,19 @@ class Project:
 
         """
         data = {"project_id": self.id, "filename": filename, "force": force, "progress": progress}
-        request = {"type": "request", "cmd": "project_save", "data": data}
         # Set timeout to None (blocking) as command can operate over large quantities of data to avoid timeout
-        response = self.connection.send_and_receive(request, None)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        self.filename = response["data"]["filename"]
-        return response["data"]["filename"]
+        response_data = self.connection.request("project_save", data, None)
+        self.filename = response_data["filename"]
+        return response_data["filename"]
 
     def start_recording(self):
         """ Start a new recording.
 
         """
-        data = {"project_id": self.id}
-        request = {"type": "request", "cmd": "project_start_recording", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("project_start_recording", self._id_data)
 
     def stop_recording(self):
         """ Stop the running recording.
 
         """
-        data = {"project_id": self.id}
-        request = {"type": "request", "cmd": "project_stop_recording", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("project_stop_recording", self._id_data)
@@ -2,7 +2,6 @@
 # pylint: disable=missing-module-docstring
 import unicodedata
 from dateutil.parser import isoparse
-from otii_tcp_client import otii_exception
 
 CHUNK_SIZE = 40000
 
@@ -28,6 +27,8 @@ class Recording:
 
         """
         self.id = recording_dict["recording_id"]
+        # Data of the commands that only take the recording id, created once
+        self._id_data = {"recording_id": self.id}
         self.name = recording_dict["name"]
         starttimestring = recording_dict.get("start-time")
         self.start_time = isoparse(starttimestring) if starttimestring else None
@@ -37,12 +38,9 @@ class Recording:
         """ Delete the recording.
 
         """
-        data = {"recording_id": self.id}
-        request = {"type": "request", "cmd": "recording_delete", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("recording_delete", self._id_data)
         self.id = -1
+        self._id_data = {"recording_id": self.id}
 
     def downsample_channel(self, device_id, channel, factor):
         """ Downsample the recording on a channel.
@@ -54,11 +52,8 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "device_id": device_id, "channel": channel, "factor": factor}
-        request = {"type": "request", "cmd": "recording_downsample_channel", "data": data}
         # Set timeout to None (blocking) as command can operate over large quantities of data to avoid timeout
-        response = self.connection.send_and_receive(request, None)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("recording_downsample_channel", data, None)
 
     def get_channel_data_count(self, device_id, channel):
         """ Get number of data entries in a channel for the recording.
@@ -72,11 +67,7 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "device_id": device_id, "channel": channel}
-        request = {"type": "request", "cmd": "recording_get_channel_data_count", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["count"]
+        return self.connection.request("recording_get_channel_data_count", data)["count"]
 
     def get_channel_data_index(self, device_id, channel, timestamp):
         """ Get the index of a data entry in a channel for a specific recording for a given timestamp.
@@ -91,11 +82,7 @@ class Recording:
 
         """
         data = {"device_id": device_id, "recording_id": self.id, "channel": channel, "timestamp": timestamp}
-        request = {"type": "request", "cmd": "recording_get_channel_data_index", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["index"]
+        return self.connection.request("recording_get_channel_data_index", data)["index"]
 
     def get_channel_data(self, device_id, channel, index, count, strip = True):
         """ Get data entries from a specified channel of a specific recording.
@@ -113,11 +100,7 @@ class Recording:
         """
         if channel in [ "rx", "i1", "i2" ]:
             request_data = {"device_id": device_id, "recording_id": self.id, "channel": channel, "index": index, "count":count}
-            request = {"type": "request", "cmd": "recording_get_channel_data", "data": request_data}
-            response = self.connection.send_and_receive(request, None)
-            if response["type"] == "error":
-                raise otii_exception.Otii_Exception(response)
-            data = response["data"]
+            data = self.connection.request("recording_get_channel_data", request_data, None)
             if channel == "rx" and strip:
                 data["values"] = [
                     {"value": remove_control_characters(value["value"]), "timestamp": value["timestamp"]}
@@ -126,19 +109,16 @@ class Recording:
             return data
 
         request_data = {"device_id": device_id, "recording_id": self.id, "channel": channel}
-        request = {"type": "request", "cmd": "recording_get_channel_data", "data": request_data}
         data = None
         while count > 0:
             chunk = min(count, CHUNK_SIZE)
-            request["data"]["index"] = index
-            request["data"]["count"] = chunk
-            response = self.connection.send_and_receive(request, None)
-            if response["type"] == "error":
-                raise otii_exception.Otii_Exception(response)
+            request_data["index"] = index
+            request_data["count"] = chunk
+            response_data = self.connection.request("recording_get_channel_data", request_data, None)
             if data is None:
-                data = response["data"]
+                data = response_data
             else:
-                data["values"].extend(response["data"]["values"])
+                data["values"].extend(response_data["values"])
             count -= chunk
             index += chunk
         return data
@@ -155,11 +135,7 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "device_id": device_id, "channel": channel}
-        request = {"type": "request", "cmd": "recording_get_channel_info", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]
+        return self.connection.request("recording_get_channel_info", data)
 
     def get_channel_statistics(self, device_id, channel, from_time, to_time):
         """ Get statistics for a channel in the recording.
@@ -175,11 +151,7 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "device_id": device_id, "channel": channel, "from": from_time, "to": to_time}
-        request = {"type": "request", "cmd": "recording_get_channel_statistics", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]
+        return self.connection.request("recording_get_channel_statistics", data)
 
     def get_log_offset(self, device_id, channel):
         """ Get the offset of an log
@@ -195,11 +167,7 @@ class Recording:
         data = {"recording_id": self.id, "channel": channel}
         if device_id is not None:
             data["device_id"] = device_id
-        request = {"type": "request", "cmd": "recording_get_log_offset", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["offset"]
+        return self.connection.request("recording_get_log_offset", data)["offset"]
 
     def get_offset(self):
         """ Get the offset of the recording
@@ -208,12 +176,7 @@ class Recording:
             int: The offset of the recording
 
         """
-        data = {"recording_id": self.id}
-        request = {"type": "request", "cmd": "recording_get_offset", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["offset"]
+        return self.connection.request("recording_get_offset", self._id_data)["offset"]
 
     def import_log(self, filename, converter):
         """ Import log into recording.
@@ -227,12 +190,8 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "filename": filename, "converter": converter}
-        request = {"type": "request", "cmd": "recording_import_log", "data": data}
         # Set timeout to None (blocking) as command can operate over large quantities of data to avoid timeout
-        response = self.connection.send_and_receive(request, None)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["log_id"]
+        return self.connection.request("recording_import_log", data, None)["log_id"]
 
     def is_running(self):
         """ Check if recording is ongoing.
@@ -241,12 +200,7 @@ class Recording:
             bool: True is recording is ongoing, False if stopped.
 
         """
-        data = {"recording_id": self.id}
-        request = {"type": "request", "cmd": "recording_is_running", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
-        return response["data"]["running"]
+        return self.connection.request("recording_is_running", self._id_data)["running"]
 
     def log(self, text, timestamp = 0):
         """ Write text to time synchronized log window.
@@ -260,10 +214,7 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "text": text, "timestamp": timestamp}
-        request = {"type": "request", "cmd": "recording_log", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("recording_log", data)
 
     def rename(self, name):
         """ Change the name of the recording.
@@ -273,10 +224,7 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "name": name}
-        request = {"type": "request", "cmd": "recording_rename", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("recording_rename", data)
         self.name = name
 
     def set_log_offset(self, device_id, channel, offset):
@@ -291,10 +239,7 @@ class Recording:
         data = {"recording_id": self.id, "channel": channel, "offset": offset}
         if device_id is not None:
             data["device_id"] = device_id
-        request = {"type": "request", "cmd": "recording_set_log_offset", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("recording_set_log_offset", data)
 
     def set_offset(self, offset):
         """ Set the offset of the recording
@@ -304,7 +249,4 @@ class Recording:
 
         """
         data = {"recording_id": self.id, "offset": offset}
-        request = {"type": "request", "cmd": "recording_set_offset", "data": data}
-        response = self.connection.send_and_receive(request)
-        if response["type"] == "error":
-            raise otii_exception.Otii_Exception(response)
+        self.connection.request("recording_set_offset", data)
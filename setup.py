@@ -1,10 +1,21 @@
 #!/usr/bin/env python
+import os
 from setuptools import setup
 import otii_tcp_client  # For accessing __version__ in __init__.py
 
 with open("README.md", "r") as fh:
     long_description = fh.read()
 
+# Set OTII_TCP_CLIENT_COMPILE=1 to compile the battery emulator module with mypyc.
+# The pure Python package is built when mypyc is not installed.
+ext_modules = []
+if os.environ.get("OTII_TCP_CLIENT_COMPILE") == "1":
+    try:
+        from mypyc.build import mypycify
+        ext_modules = mypycify(["--ignore-missing-imports", "otii_tcp_client/battery_emulator.py"])
+    except ImportError:
+        pass
+
 setup(
     name="otii_tcp_client",
     packages=["otii_tcp_client"],
@@ -17,6 +28,8 @@ setup(
     url="https://www.qoitech.com/",
     keywords=["qoitech", "otii", "arc", "ace", "tcp"],
     install_requires=["python-dateutil>=2.7.0"],
+    extras_require={"orjson": ["orjson>=3.0.0"], "msgspec": ["msgspec>=0.18.0"]},
+    ext_modules=ext_modules,
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
@@ -89,6 +89,33 @@ class TestBatteryEmulator(unittest.TestCase):
         soc_tracking = battery_emulator.get_soc_tracking()
         self.assertFalse(soc_tracking)
 
+    def test_get_state(self):
+        device = TestBatteryEmulator.device
+        battery_profiles = TestBatteryEmulator.battery_profiles
+
+        # Reset power supply
+        device.set_supply_power_box()
+
+        # Select a profile
+        profile = battery_profiles[MODEL]
+        battery_profile_id = profile['battery_profile_id']
+
+        # Select the profile for emulation
+        battery_emulator = device.set_supply_battery_emulator(battery_profile_id,
+                                                              series = 2,
+                                                              parallel = 3,
+                                                              used_capacity = 0.123,
+                                                              soc_tracking = False
+                                                              )
+
+        # Verify
+        state = battery_emulator.get_state()
+        self.assertEqual(state['series'], 2)
+        self.assertEqual(state['parallel'], 3)
+        self.assertEqual(state['used_capacity'], 0.123)
+        self.assertEqual(state['soc'], battery_emulator.get_soc())
+        self.assertFalse(state['soc_tracking'])
+
     def test_set_supply_to_battery_emulator_soc(self):
         device = TestBatteryEmulator.device
         battery_profiles = TestBatteryEmulator.battery_profiles